@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, List, Optional, Set
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of redis-py (decode_responses=True) the app uses."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._hashes: Dict[str, Dict[str, str]] = {}
+        self._sets: Dict[str, Set[str]] = {}
+
+    def hget(self, name: str, key) -> Optional[str]:
+        with self._lock:
+            return self._hashes.get(name, {}).get(str(key))
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._hashes.get(name, {}))
+
+    def hset(self, name: str, key=None, value=None, mapping: Optional[dict] = None) -> int:
+        with self._lock:
+            data = self._hashes.setdefault(name, {})
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            added = 0
+            for k, v in items.items():
+                added += str(k) not in data
+                data[str(k)] = str(v)
+            return added
+
+    def hincrby(self, name: str, key, amount: int = 1) -> int:
+        with self._lock:
+            data = self._hashes.setdefault(name, {})
+            value = int(data.get(str(key), 0)) + amount
+            data[str(key)] = str(value)
+            return value
+
+    def hdel(self, name: str, *keys) -> int:
+        with self._lock:
+            data = self._hashes.get(name, {})
+            removed = 0
+            for key in keys:
+                removed += data.pop(str(key), None) is not None
+            if not data:
+                self._hashes.pop(name, None)
+            return removed
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(name in self._hashes or name in self._sets for name in names)
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for name in names:
+                removed += (self._hashes.pop(name, None) is not None) or (self._sets.pop(name, None) is not None)
+            return removed
+
+    def expire(self, name: str, seconds: int) -> bool:
+        # Süre dolumu simüle edilmez
+        return self.exists(name) == 1
+
+    def sadd(self, name: str, *values) -> int:
+        with self._lock:
+            data = self._sets.setdefault(name, set())
+            before = len(data)
+            data.update(str(v) for v in values)
+            return len(data) - before
+
+    def srem(self, name: str, *values) -> int:
+        with self._lock:
+            data = self._sets.get(name, set())
+            before = len(data)
+            data.difference_update(str(v) for v in values)
+            return before - len(data)
+
+    def spop(self, name: str, count: Optional[int] = None):
+        with self._lock:
+            data = self._sets.get(name, set())
+            if count is None:
+                return data.pop() if data else None
+            popped: List[str] = []
+            while data and len(popped) < count:
+                popped.append(data.pop())
+            return popped
+
+    def smembers(self, name: str) -> Set[str]:
+        with self._lock:
+            return set(self._sets.get(name, set()))
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._calls]
+        self._calls = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._calls = []
@@ -0,0 +1,64 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_redis: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis
+
+
+def set_redis(client) -> None:
+    """Replace the shared client, e.g. with FakeRedis in tests."""
+    global _redis
+    _redis = client
+
+
+class PubSubListener:
+    """Background thread that subscribes to one Redis channel and hands messages to `callback`."""
+
+    def __init__(self, channel: str, callback, retry_seconds: float = 5.0):
+        self.channel = channel
+        self.callback = callback
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"subscribe-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.retry_seconds + 1)
+
+    def _run(self):
+        pubsub = None
+        while not self._stop.is_set():
+            try:
+                if pubsub is None:
+                    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.channel)
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    self.callback(message["data"])
+            except Exception:
+                logger.exception("SUBSCRIBE %s failed, retrying in %ss", self.channel, self.retry_seconds)
+                if pubsub is not None:
+                    pubsub.close()
+                    pubsub = None
+                self._stop.wait(self.retry_seconds)
+        if pubsub is not None:
+            pubsub.close()
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8000")
+USER_CLIENT_TIMEOUT = float(os.getenv("USER_CLIENT_TIMEOUT", "2.0"))
+USER_CLIENT_CACHE_TTL = float(os.getenv("USER_CLIENT_CACHE_TTL", "60"))
+USER_CLIENT_MAX_CONNECTIONS = int(os.getenv("USER_CLIENT_MAX_CONNECTIONS", "20"))
+USER_CLIENT_BATCH_SIZE = 500
+
+
+class UserServiceUnavailable(Exception):
+    pass
+
+
+class _LookupCancelled(UserServiceUnavailable):
+    """The request that owned a shared lookup was cancelled before it finished."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets requests
+    through again (half-open) once `reset_timeout` seconds have passed."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: Dict[int, Tuple[float, Optional[dict]]] = {}
+
+    def get(self, key: int) -> Tuple[bool, Optional[dict]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return False, None
+        return True, value
+
+    def set(self, key: int, value: Optional[dict]):
+        if len(self._data) >= self.max_size:
+            # En eski kaydı at (dict ekleme sırasını korur)
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._data.clear()
+
+
+class UserServiceClient:
+    """Async client for user-service's batch lookup.
+
+    Concurrent lookups for the same ids share one in-flight request, results
+    (including misses) are cached for `cache_ttl` seconds and failures trip a
+    circuit breaker. Pass `transport=httpx.ASGITransport(app=...)` to run it
+    against an in-process user-service app.
+    """
+
+    def __init__(
+        self,
+        base_url: str = AUTH_SERVICE_URL,
+        timeout: float = USER_CLIENT_TIMEOUT,
+        cache_ttl: float = USER_CLIENT_CACHE_TTL,
+        max_connections: int = USER_CLIENT_MAX_CONNECTIONS,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+        self.cache = TTLCache(cache_ttl)
+        self.breaker = breaker or CircuitBreaker()
+        self._inflight: Dict[int, asyncio.Future] = {}
+
+    async def get_user(self, user_id: int) -> Optional[dict]:
+        users = await self.get_users([user_id])
+        return users.get(user_id)
+
+    async def get_users(self, user_ids: Iterable[int]) -> Dict[int, dict]:
+        result: Dict[int, dict] = {}
+        waiting: Dict[int, asyncio.Future] = {}
+        to_fetch: List[int] = []
+
+        for user_id in set(user_ids):
+            hit, user = self.cache.get(user_id)
+            if hit:
+                if user is not None:
+                    result[user_id] = user
+            elif user_id in self._inflight:
+                waiting[user_id] = self._inflight[user_id]
+            else:
+                to_fetch.append(user_id)
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            futures = {user_id: loop.create_future() for user_id in to_fetch}
+            self._inflight.update(futures)
+            waiting.update(futures)
+            try:
+                fetched = await self._fetch(to_fetch)
+            except BaseException as exc:
+                # İptal (CancelledError) dahil: bekleyenler asla askıda kalmamalı
+                error = exc if isinstance(exc, Exception) else _LookupCancelled()
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(error)
+                        # Bekleyenler hatayı kendileri alır; "never retrieved" uyarısını sustur
+                        future.exception()
+                raise
+            else:
+                for user_id, future in futures.items():
+                    user = fetched.get(user_id)
+                    self.cache.set(user_id, user)
+                    future.set_result(user)
+            finally:
+                for user_id in to_fetch:
+                    self._inflight.pop(user_id, None)
+
+        retry: List[int] = []
+        for user_id, future in waiting.items():
+            try:
+                user = await asyncio.shield(future)
+            except _LookupCancelled:
+                retry.append(user_id)
+                continue
+            if user is not None:
+                result[user_id] = user
+        if retry:
+            # Sahibi iptal edilen sorguyu kendimiz tekrarlarız
+            result.update(await self.get_users(retry))
+        return result
+
+    async def _fetch(self, user_ids: List[int]) -> Dict[int, dict]:
+        if not self.breaker.allow_request():
+            raise UserServiceUnavailable("user-service circuit is open")
+
+        users: Dict[int, dict] = {}
+        try:
+            for start in range(0, len(user_ids), USER_CLIENT_BATCH_SIZE):
+                chunk = user_ids[start:start + USER_CLIENT_BATCH_SIZE]
+                response = await self._client.post("/user/batch", json={"ids": chunk})
+                response.raise_for_status()
+                for user in response.json():
+                    users[user["id"]] = user
+        except (httpx.HTTPError, ValueError) as exc:
+            self.breaker.record_failure()
+            raise UserServiceUnavailable(str(exc)) from exc
+
+        self.breaker.record_success()
+        return users
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_user_client: Optional[UserServiceClient] = None
+
+
+def get_user_client() -> UserServiceClient:
+    global _user_client
+    if _user_client is None:
+        _user_client = UserServiceClient()
+    return _user_client
+
+
+async def close_user_client():
+    global _user_client
+    if _user_client is not None:
+        await _user_client.aclose()
+        _user_client = None
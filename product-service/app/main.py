@@ -1,10 +1,26 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import products, cart, orders
-from app.database import engine, Base
+from app.routers import products, cart, orders, analytics, profiles
+from app.database import engine, SessionLocal
+from app.clients.user_client import close_user_client
+from app.services import catalog, order_events
+from ecommerce_common.profiling import install_profiling
+from ecommerce_common.metrics import metrics, router as metrics_router
+from app.ratelimit import install_rate_limiting
+from app.cache.redis_client import get_redis
+from app.repositories.cart_backend import (
+    CART_BACKEND, CART_FLUSH_INTERVAL_SECONDS, CART_FLUSH_BATCH_SIZE
+)
+from app.repositories.redis_cart_repository import flush_dirty_carts
+from app.tasks.cart_sweeper import run_sweep, CART_SWEEP_INTERVAL_SECONDS
 
-# Veritabanı tablolarını oluştur
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Product Service",
@@ -12,6 +28,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Rate limiting (CORS'un içinde kalsın ki 429 yanıtları da CORS başlıklarını alsın)
+install_rate_limiting(app)
+
 # CORS ayarları
 app.add_middleware(
     CORSMiddleware,
@@ -21,10 +40,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# İstek profilleme (PROFILING_ENABLED=true değilse hiçbir şey eklenmez)
+install_profiling(app, engine)
+
 # API rotalarını ekle
 app.include_router(products.router, prefix="/api", tags=["products"])
 app.include_router(cart.router, prefix="/api", tags=["cart"])
 app.include_router(orders.router, prefix="/api", tags=["orders"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(profiles.router, prefix="/api", tags=["profiling"])
+app.include_router(metrics_router)
+
+metrics.set_gauge("app_import_seconds", time.perf_counter() - _import_started)
+
+def _flush_carts():
+    db = SessionLocal()
+    try:
+        return flush_dirty_carts(db, get_redis(), CART_FLUSH_BATCH_SIZE)
+    finally:
+        db.close()
+
+async def _flush_carts_periodically():
+    while True:
+        await asyncio.sleep(CART_FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(_flush_carts)
+        except Exception:
+            logger.exception("Cart flush failed")
+
+async def _sweep_carts_periodically():
+    while True:
+        await asyncio.sleep(CART_SWEEP_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(run_sweep)
+        except Exception:
+            logger.exception("Cart sweep failed")
+
+async def _keep_catalog_fresh():
+    try:
+        await run_in_threadpool(catalog.load_snapshot)
+    except Exception:
+        logger.exception("Catalog snapshot load failed, serving products from the database")
+    while True:
+        await asyncio.sleep(catalog.CATALOG_RECONCILE_SECONDS)
+        try:
+            await run_in_threadpool(catalog.reconcile_snapshot)
+        except Exception:
+            logger.exception("Catalog reconcile failed")
+
+@app.on_event("startup")
+async def startup():
+    order_events.start(asyncio.get_running_loop())
+    if catalog.CATALOG_SNAPSHOT_ENABLED:
+        # Snapshot arka planda yüklenir; hazır olana kadar okumalar veritabanına gider
+        catalog.start()
+        app.state.catalog_task = asyncio.create_task(_keep_catalog_fresh())
+    if CART_BACKEND == "redis":
+        app.state.cart_flush_task = asyncio.create_task(_flush_carts_periodically())
+    if CART_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.cart_sweep_task = asyncio.create_task(_sweep_carts_periodically())
+    startup_seconds = time.perf_counter() - _import_started
+    metrics.set_gauge("app_startup_seconds", startup_seconds)
+    logger.info("Product service started in %.2fs", startup_seconds)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if CART_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.cart_sweep_task.cancel()
+    if CART_BACKEND == "redis":
+        app.state.cart_flush_task.cancel()
+        await run_in_threadpool(_flush_carts)
+    if catalog.CATALOG_SNAPSHOT_ENABLED:
+        app.state.catalog_task.cancel()
+        catalog.stop()
+    order_events.stop()
+    await close_user_client()
 
 @app.get("/", tags=["health"])
 def health_check():
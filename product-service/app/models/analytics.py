@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, Float, Date
+from app.database import Base
+
+class ProductDailySales(Base):
+    __tablename__ = "product_daily_sales"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True, index=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
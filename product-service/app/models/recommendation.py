@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, JSON, DateTime
+from datetime import datetime
+from app.database import Base
+
+class ProductCooccurrence(Base):
+    __tablename__ = "product_cooccurrence"
+
+    product_id = Column(Integer, primary_key=True)
+    related_product_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)  # birlikte görüldüğü sipariş sayısı
+
+class ProductRecommendation(Base):
+    __tablename__ = "product_recommendations"
+
+    product_id = Column(Integer, primary_key=True)
+    neighbours = Column(JSON, nullable=False)  # [[related_product_id, count], ...] azalan sırada
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,13 @@
+"""product-service rate-limit rules; the limiter is ecommerce_common.ratelimit."""
+from ecommerce_common import ratelimit
+
+DEFAULT_RULES = [
+    {"name": "checkout", "method": "POST", "path": "/api/orders/", "rate": "10/minute", "burst": 5, "scope": "token"},
+    {"name": "checkout_ip", "method": "POST", "path": "/api/orders/", "rate": "60/minute", "burst": 20, "scope": "ip"},
+    {"name": "list_products", "method": "GET", "path": "/api/products/", "rate": "300/minute", "burst": 60, "scope": "token"},
+    {"name": "list_orders", "method": "GET", "path": "/api/orders/", "rate": "60/minute", "burst": 20, "scope": "token"},
+]
+
+
+def install_rate_limiting(app):
+    ratelimit.install_rate_limiting(app, DEFAULT_RULES)
@@ -0,0 +1,129 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import func, desc
+from sqlalchemy.orm import Session
+
+from app.models.analytics import ProductDailySales
+from app.models.order import Order, OrderItem
+from app.models.product import Product, Category, product_category
+from app.repositories.upsert import dialect_insert
+
+# Bu durumdaki siparişler satış sayılmaz
+EXCLUDED_STATUSES = ("cancelled",)
+
+
+def counts_as_sale(status: str) -> bool:
+    return status not in EXCLUDED_STATUSES
+
+
+class AnalyticsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_order(self, created_at: datetime, items: Iterable, sign: int = 1):
+        """Add (or with sign=-1 subtract) an order's lines to the daily aggregates.
+
+        Does not commit, so the caller applies it in the order's own transaction.
+        """
+        rows = {}
+        for item in items:
+            row = rows.setdefault(item.product_id, {
+                "day": created_at.date(),
+                "product_id": item.product_id,
+                "quantity": 0,
+                "revenue": 0.0,
+                "order_count": sign,
+            })
+            row["quantity"] += sign * item.quantity
+            row["revenue"] += sign * item.quantity * item.price
+        if not rows:
+            return
+
+        stmt = dialect_insert(self.db, ProductDailySales).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductDailySales.day, ProductDailySales.product_id],
+            set_={
+                "quantity": ProductDailySales.quantity + stmt.excluded.quantity,
+                "revenue": ProductDailySales.revenue + stmt.excluded.revenue,
+                "order_count": ProductDailySales.order_count + stmt.excluded.order_count,
+            },
+        )
+        self.db.execute(stmt)
+
+    def _since(self, days: int) -> date:
+        return datetime.utcnow().date() - timedelta(days=days - 1)
+
+    def top_products(self, days: int = 30, limit: int = 10) -> List[dict]:
+        quantity = func.sum(ProductDailySales.quantity).label("quantity")
+        revenue = func.sum(ProductDailySales.revenue).label("revenue")
+        rows = (
+            self.db.query(Product.id, Product.name, quantity, revenue)
+            .join(Product, Product.id == ProductDailySales.product_id)
+            .filter(ProductDailySales.day >= self._since(days))
+            .group_by(Product.id, Product.name)
+            .having(func.sum(ProductDailySales.quantity) > 0)
+            .order_by(desc("quantity"))
+            .limit(limit)
+            .all()
+        )
+        return [
+            {"product_id": r.id, "name": r.name, "quantity": r.quantity, "revenue": r.revenue}
+            for r in rows
+        ]
+
+    def daily_revenue(self, days: int = 30) -> List[dict]:
+        rows = (
+            self.db.query(
+                ProductDailySales.day,
+                func.sum(ProductDailySales.quantity).label("quantity"),
+                func.sum(ProductDailySales.revenue).label("revenue"),
+            )
+            .filter(ProductDailySales.day >= self._since(days))
+            .group_by(ProductDailySales.day)
+            .order_by(ProductDailySales.day)
+            .all()
+        )
+        return [{"day": r.day, "quantity": r.quantity, "revenue": r.revenue} for r in rows]
+
+    def category_sales(self, days: int = 30) -> List[dict]:
+        quantity = func.sum(ProductDailySales.quantity).label("quantity")
+        revenue = func.sum(ProductDailySales.revenue).label("revenue")
+        rows = (
+            self.db.query(Category.id, Category.name, quantity, revenue)
+            .select_from(ProductDailySales)
+            .join(product_category, product_category.c.product_id == ProductDailySales.product_id)
+            .join(Category, Category.id == product_category.c.category_id)
+            .filter(ProductDailySales.day >= self._since(days))
+            .group_by(Category.id, Category.name)
+            .order_by(desc("revenue"))
+            .all()
+        )
+        return [
+            {"category_id": r.id, "name": r.name, "quantity": r.quantity, "revenue": r.revenue}
+            for r in rows
+        ]
+
+    def rebuild(self) -> int:
+        """Recompute all aggregates from orders/order_items in one transaction."""
+        day = func.date(Order.created_at)
+        source = (
+            self.db.query(
+                day.label("day"),
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.quantity * OrderItem.price),
+                func.count(func.distinct(Order.id)),
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .filter(Order.status.notin_(EXCLUDED_STATUSES))
+            .group_by(day, OrderItem.product_id)
+        )
+        self.db.query(ProductDailySales).delete(synchronize_session=False)
+        result = self.db.execute(
+            ProductDailySales.__table__.insert().from_select(
+                ["day", "product_id", "quantity", "revenue", "order_count"], source.subquery().select()
+            )
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,19 @@
+import os
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.cache.redis_client import get_redis
+from app.repositories.cart_repository import CartRepository
+from app.repositories.redis_cart_repository import RedisCartRepository
+
+CART_BACKEND = os.getenv("CART_BACKEND", "sql")  # sql | redis
+CART_FLUSH_INTERVAL_SECONDS = float(os.getenv("CART_FLUSH_INTERVAL_SECONDS", "30"))
+CART_FLUSH_BATCH_SIZE = int(os.getenv("CART_FLUSH_BATCH_SIZE", "500"))
+
+
+def get_cart_repository(db: Session = Depends(get_db)):
+    if CART_BACKEND == "redis":
+        return RedisCartRepository(db, get_redis())
+    return CartRepository(db)
@@ -3,6 +3,7 @@ from app.models.cart import Cart, CartItem
 from app.models.product import Product
 from app.schemas.cart import CartItemCreate
 from typing import Optional
+from datetime import datetime
 from fastapi import HTTPException
 
 class CartRepository:
@@ -34,6 +35,8 @@ class CartRepository:
             quantity=item.quantity
         )
         self.db.add(cart_item)
+        # Kalem değişiklikleri sepet satırını güncellemez; süpürücü updated_at'e bakıyor
+        cart.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(cart_item)
         return cart_item
@@ -47,6 +50,7 @@ class CartRepository:
         if not cart_item:
             return False
         self.db.delete(cart_item)
+        cart.updated_at = datetime.utcnow()
         self.db.commit()
         return True
 
@@ -58,5 +62,10 @@ class CartRepository:
         if not cart:
             return False
         self.db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        cart.updated_at = datetime.utcnow()
         self.db.commit()
-        return True 
\ No newline at end of file
+        return True
+
+    def persist(self, user_id: int):
+        # SQL sepeti zaten kalıcı; RedisCartRepository ile aynı arayüz için
+        pass
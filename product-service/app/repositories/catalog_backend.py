@@ -0,0 +1,41 @@
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.repositories.product_repository import ProductRepository
+from app.services.catalog import CATALOG_SNAPSHOT_ENABLED, CatalogSnapshot, SnapshotUnavailable, catalog
+
+
+class SnapshotReader:
+    """Reads from the snapshot, falling back to the database if it was dropped mid-request."""
+
+    def __init__(self, snapshot: CatalogSnapshot, db: Session):
+        self.snapshot = snapshot
+        self.db = db
+
+    def get_product(self, product_id: int):
+        try:
+            return self.snapshot.get_product(product_id)
+        except SnapshotUnavailable:
+            return ProductRepository(self.db).get_product(product_id)
+
+    def get_products(self, skip: int = 0, limit: int = 100, category_id=None):
+        try:
+            return self.snapshot.get_products(skip, limit, category_id)
+        except SnapshotUnavailable:
+            return ProductRepository(self.db).get_products(skip, limit, category_id)
+
+    def get_products_by_ids(self, product_ids: List[int]):
+        try:
+            return self.snapshot.get_products_by_ids(product_ids)
+        except SnapshotUnavailable:
+            return ProductRepository(self.db).get_products_by_ids(product_ids)
+
+
+def get_product_reader(db: Session = Depends(get_db)):
+    """Catalog snapshot once it is loaded, otherwise the database."""
+    if CATALOG_SNAPSHOT_ENABLED and catalog.ready:
+        return SnapshotReader(catalog, db)
+    return ProductRepository(db)
@@ -2,6 +2,10 @@ from sqlalchemy.orm import Session
 from app.models.order import Order, OrderItem
 from app.models.product import Product
 from app.schemas.order import OrderCreate
+from app.repositories.analytics_repository import AnalyticsRepository, counts_as_sale
+from app.repositories.recommendation_repository import RecommendationRepository
+from app.services.catalog import products_changed
+from app.services.order_events import publish_status_change
 from typing import List, Optional
 from fastapi import HTTPException
 
@@ -37,7 +41,11 @@ class OrderRepository:
                 price=item.price
             )
             self.db.add(order_item)
+        AnalyticsRepository(self.db).record_order(db_order.created_at, order.items)
+        RecommendationRepository(self.db).record_order(item.product_id for item in order.items)
         self.db.commit()
+        # Stoklar değişti
+        products_changed(self.db, [item.product_id for item in order.items])
         return db_order
 
     def get_user_orders(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Order]:
@@ -47,10 +55,19 @@ class OrderRepository:
         return self.db.query(Order).filter(Order.id == order_id).first()
 
     def update_order_status(self, order_id: int, status: str) -> Optional[Order]:
-        order = self.get_order(order_id)
+        # Satır kilitlenir: eşzamanlı iki iptal özet tablodan iki kez düşmesin
+        order = self.db.query(Order).filter(Order.id == order_id).with_for_update().populate_existing().first()
         if not order:
             return None
+        was_sale, is_sale = counts_as_sale(order.status), counts_as_sale(status)
+        if was_sale != is_sale:
+            AnalyticsRepository(self.db).record_order(
+                order.created_at, order.items, sign=1 if is_sale else -1
+            )
+        previous_status = order.status
         order.status = status
         self.db.commit()
         self.db.refresh(order)
+        if previous_status != status:
+            publish_status_change(self.db, order, previous_status)
         return order 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
-from app.models.product import Product, Category
+from app.models.product import Product, Category, product_category
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.catalog import products_changed
 from typing import List, Optional
 from fastapi import HTTPException
 
@@ -11,8 +12,16 @@ class ProductRepository:
     def get_product(self, product_id: int) -> Optional[Product]:
         return self.db.query(Product).filter(Product.id == product_id).first()
 
-    def get_products(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        return self.db.query(Product).offset(skip).limit(limit).all()
+    def get_products(self, skip: int = 0, limit: int = 100, category_id: Optional[int] = None) -> List[Product]:
+        query = self.db.query(Product)
+        if category_id is not None:
+            query = query.join(product_category).filter(product_category.c.category_id == category_id)
+        return query.order_by(Product.id).offset(skip).limit(limit).all()
+
+    def get_products_by_ids(self, product_ids: List[int]) -> List[Product]:
+        if not product_ids:
+            return []
+        return self.db.query(Product).filter(Product.id.in_(set(product_ids))).all()
 
     def create_product(self, product: ProductCreate) -> Product:
         categories = self.db.query(Category).filter(Category.id.in_(product.category_ids)).all()
@@ -30,6 +39,7 @@ class ProductRepository:
         self.db.add(db_product)
         self.db.commit()
         self.db.refresh(db_product)
+        products_changed(self.db, [db_product.id])
         return db_product
 
     def update_product(self, product_id: int, product: ProductUpdate) -> Optional[Product]:
@@ -52,6 +62,7 @@ class ProductRepository:
 
         self.db.commit()
         self.db.refresh(db_product)
+        products_changed(self.db, [product_id])
         return db_product
 
     def delete_product(self, product_id: int) -> bool:
@@ -60,4 +71,5 @@ class ProductRepository:
             return False
         self.db.delete(db_product)
         self.db.commit()
+        products_changed(self.db, [product_id])
         return True 
\ No newline at end of file
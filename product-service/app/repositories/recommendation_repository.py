@@ -0,0 +1,114 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.order import OrderItem
+from app.models.recommendation import ProductCooccurrence, ProductRecommendation
+from app.repositories.upsert import dialect_insert
+from app.services.recommendations import build_cooccurrence, merge_neighbours, top_k_neighbours
+
+RECOMMENDATION_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", "20"))
+INSERT_CHUNK_SIZE = 5000
+
+
+class RecommendationRepository:
+    def __init__(self, db: Session, k: int = RECOMMENDATION_TOP_K):
+        self.db = db
+        self.k = k
+
+    def get_recommendations(self, product_id: int, limit: int = 10) -> List[int]:
+        row = self.db.get(ProductRecommendation, product_id)
+        if row is None:
+            return []
+        return [related_id for related_id, _ in row.neighbours[:limit]]
+
+    def get_batch_recommendations(self, product_ids: List[int], limit: int = 10) -> List[int]:
+        """Combined neighbours of several products (e.g. a cart), excluding the products themselves."""
+        exclude = set(product_ids)
+        scores: Dict[int, int] = defaultdict(int)
+        rows = self.db.query(ProductRecommendation).filter(
+            ProductRecommendation.product_id.in_(exclude)
+        ).all()
+        for row in rows:
+            for related_id, count in row.neighbours:
+                if related_id not in exclude:
+                    scores[related_id] += count
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [related_id for related_id, _ in ranked[:limit]]
+
+    def record_order(self, product_ids: Iterable[int]):
+        """Count one new order's product pairs and refresh the affected top-K lists.
+
+        Does not commit, so the caller applies it in the order's own transaction.
+        """
+        products = sorted(set(product_ids))
+        if len(products) < 2:
+            return
+        pairs = [
+            {"product_id": a, "related_product_id": b, "count": 1}
+            for a in products for b in products if a != b
+        ]
+        stmt = dialect_insert(self.db, ProductCooccurrence).values(pairs)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductCooccurrence.product_id, ProductCooccurrence.related_product_id],
+            set_={"count": ProductCooccurrence.count + 1},
+        ).returning(
+            ProductCooccurrence.product_id,
+            ProductCooccurrence.related_product_id,
+            ProductCooccurrence.count,
+        )
+        updated: Dict[int, Dict[int, int]] = defaultdict(dict)
+        for product_id, related_id, count in self.db.execute(stmt):
+            updated[product_id][related_id] = count
+
+        # Satırı olmayan ürünler için önce boş satır: FOR UPDATE hiçbir şeyi kilitlemezse
+        # iki eşzamanlı sipariş aynı listeyi []'den kurar ve biri diğerini ezer
+        affected = sorted(updated)
+        self.db.execute(
+            dialect_insert(self.db, ProductRecommendation)
+            .values([{"product_id": product_id, "neighbours": []} for product_id in affected])
+            .on_conflict_do_nothing(index_elements=[ProductRecommendation.product_id])
+        )
+        # Eşzamanlı siparişler birbirini kilitlemesin diye satırlar sabit sırayla kilitlenir
+        rows = {
+            row.product_id: row
+            for row in self.db.query(ProductRecommendation)
+            .filter(ProductRecommendation.product_id.in_(affected))
+            .order_by(ProductRecommendation.product_id)
+            .with_for_update()
+            .populate_existing()
+            .all()
+        }
+        for product_id in affected:
+            row = rows[product_id]
+            row.neighbours = merge_neighbours(row.neighbours, updated[product_id], self.k)
+
+    def rebuild(self) -> int:
+        """Recompute co-occurrence counts and top-K lists from all order_items."""
+        rows = self.db.query(OrderItem.order_id, OrderItem.product_id).all()
+        pairs = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        cooccurrence, products = build_cooccurrence(pairs[:, 0], pairs[:, 1])
+        neighbours = top_k_neighbours(cooccurrence, products, self.k)
+
+        self.db.query(ProductCooccurrence).delete(synchronize_session=False)
+        self.db.query(ProductRecommendation).delete(synchronize_session=False)
+
+        coo = cooccurrence.tocoo()
+        rows_a, rows_b, counts = products[coo.row], products[coo.col], coo.data
+        for start in range(0, len(counts), INSERT_CHUNK_SIZE):
+            end = start + INSERT_CHUNK_SIZE
+            self.db.execute(ProductCooccurrence.__table__.insert(), [
+                {"product_id": int(a), "related_product_id": int(b), "count": int(c)}
+                for a, b, c in zip(rows_a[start:end], rows_b[start:end], counts[start:end])
+            ])
+        items = list(neighbours.items())
+        for start in range(0, len(items), INSERT_CHUNK_SIZE):
+            self.db.execute(ProductRecommendation.__table__.insert(), [
+                {"product_id": product_id, "neighbours": top}
+                for product_id, top in items[start:start + INSERT_CHUNK_SIZE]
+            ])
+        self.db.commit()
+        return len(neighbours)
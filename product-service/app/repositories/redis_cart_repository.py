@@ -0,0 +1,282 @@
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
+from app.repositories.product_repository import ProductRepository
+from app.schemas.cart import CartItemCreate
+
+logger = logging.getLogger(__name__)
+
+CART_REDIS_TTL_SECONDS = int(os.getenv("CART_REDIS_TTL_SECONDS", str(30 * 24 * 3600)))
+DIRTY_CARTS_KEY = "carts:dirty"
+
+
+def _items_key(user_id: int) -> str:
+    return f"cart:{user_id}"
+
+
+def _meta_key(user_id: int) -> str:
+    return f"cart:{user_id}:meta"
+
+
+class CartItemView:
+    __slots__ = ("id", "cart_id", "product_id", "quantity", "product")
+
+    def __init__(self, cart_id: int, product_id: int, quantity: int, product=None):
+        # Redis sepetinde satır id'si yok; ürün id'si kalem id'si olarak kullanılır
+        self.id = product_id
+        self.cart_id = cart_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.product = product
+
+
+class CartView:
+    __slots__ = ("id", "user_id", "created_at", "updated_at", "items")
+
+    def __init__(self, id: int, user_id: int, created_at: datetime, updated_at: datetime,
+                 items: List[CartItemView]):
+        self.id = id
+        self.user_id = user_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.items = items
+
+
+class RedisCartRepository:
+    """CartRepository-compatible cart store backed by Redis.
+
+    Each cart is a hash of product_id -> quantity plus a small meta hash.
+    Writes only touch Redis and mark the cart dirty; `flush_dirty` (run
+    periodically) and `persist` (at checkout) write carts to Postgres.
+    """
+
+    def __init__(self, db: Session, redis):
+        self.db = db
+        self.redis = redis
+
+    def get_or_create_cart(self, user_id: int) -> CartView:
+        cart = self.get_cart(user_id)
+        if cart is None:
+            now = datetime.utcnow().isoformat()
+            self.redis.hset(_meta_key(user_id), mapping={"id": 0, "created_at": now, "updated_at": now})
+            self.redis.expire(_meta_key(user_id), CART_REDIS_TTL_SECONDS)
+            cart = self.get_cart(user_id)
+        return cart
+
+    def add_to_cart(self, user_id: int, item: CartItemCreate) -> CartItemView:
+        cart = self.get_or_create_cart(user_id)
+        product = ProductRepository(self.db).get_product(item.product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        if not product.is_active:
+            raise HTTPException(status_code=400, detail="Product is not active")
+        current = int(self.redis.hget(_items_key(user_id), item.product_id) or 0)
+        if product.stock < current + item.quantity:
+            raise HTTPException(status_code=400, detail="Not enough stock")
+
+        quantity = self.redis.hincrby(_items_key(user_id), item.product_id, item.quantity)
+        self._touch(user_id)
+        return CartItemView(cart.id, item.product_id, quantity, product)
+
+    def remove_from_cart(self, user_id: int, cart_item_id: int) -> bool:
+        self.get_or_create_cart(user_id)
+        if not self.redis.hdel(_items_key(user_id), cart_item_id):
+            return False
+        self._touch(user_id)
+        return True
+
+    def get_cart(self, user_id: int) -> Optional[CartView]:
+        pipe = self.redis.pipeline()
+        pipe.hgetall(_meta_key(user_id))
+        pipe.hgetall(_items_key(user_id))
+        meta, quantities = pipe.execute()
+        if not meta:
+            if not self._load_from_db(user_id):
+                return None
+            return self.get_cart(user_id)
+
+        cart_id = int(meta["id"])
+        products = {
+            product.id: product
+            for product in ProductRepository(self.db).get_products_by_ids([int(pid) for pid in quantities])
+        }
+        items = [
+            CartItemView(cart_id, int(pid), int(qty), products[int(pid)])
+            for pid, qty in quantities.items()
+            if int(pid) in products
+        ]
+        return CartView(
+            id=cart_id,
+            user_id=user_id,
+            created_at=datetime.fromisoformat(meta["created_at"]),
+            updated_at=datetime.fromisoformat(meta["updated_at"]),
+            items=items,
+        )
+
+    def clear_cart(self, user_id: int) -> bool:
+        if self.get_cart(user_id) is None:
+            return False
+        self.redis.delete(_items_key(user_id))
+        self._touch(user_id)
+        return True
+
+    def persist(self, user_id: int):
+        """Best-effort write at checkout; on any failure the cart is left for the periodic flush.
+
+        Runs after the order is committed, so it must never fail the request.
+        """
+        try:
+            self.redis.srem(DIRTY_CARTS_KEY, user_id)
+            failed = self._write_to_db([user_id])
+        except Exception:
+            logger.exception("Could not persist cart of user %s at checkout", user_id)
+            self.db.rollback()
+            failed = [user_id]
+        if failed:
+            try:
+                self.redis.sadd(DIRTY_CARTS_KEY, user_id)
+            except Exception:
+                # Redis erişilemiyorsa sepet zaten oradadır; bir sonraki yazmada yeniden kirlenir
+                logger.exception("Could not mark cart of user %s dirty", user_id)
+
+    def flush_dirty(self, batch_size: int = 500) -> int:
+        """Write up to `batch_size` dirty carts to Postgres in one transaction."""
+        user_ids = [int(uid) for uid in self.redis.spop(DIRTY_CARTS_KEY, batch_size) or []]
+        if not user_ids:
+            return 0
+        try:
+            failed = self._write_to_db(user_ids)
+        except Exception:
+            self.redis.sadd(DIRTY_CARTS_KEY, *user_ids)
+            raise
+        if failed:
+            self.redis.sadd(DIRTY_CARTS_KEY, *failed)
+        return len(user_ids)
+
+    def _touch(self, user_id: int):
+        pipe = self.redis.pipeline()
+        pipe.hset(_meta_key(user_id), "updated_at", datetime.utcnow().isoformat())
+        pipe.expire(_meta_key(user_id), CART_REDIS_TTL_SECONDS)
+        pipe.expire(_items_key(user_id), CART_REDIS_TTL_SECONDS)
+        pipe.sadd(DIRTY_CARTS_KEY, user_id)
+        pipe.execute()
+
+    def _load_from_db(self, user_id: int) -> bool:
+        cart = self.db.query(Cart).options(selectinload(Cart.items)).filter(Cart.user_id == user_id).first()
+        if cart is None:
+            return False
+        pipe = self.redis.pipeline()
+        pipe.hset(_meta_key(user_id), mapping={
+            "id": cart.id,
+            "created_at": cart.created_at.isoformat(),
+            "updated_at": cart.updated_at.isoformat(),
+        })
+        quantities: Dict[int, int] = {}
+        for item in cart.items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        if quantities:
+            pipe.hset(_items_key(user_id), mapping=quantities)
+        pipe.expire(_meta_key(user_id), CART_REDIS_TTL_SECONDS)
+        pipe.expire(_items_key(user_id), CART_REDIS_TTL_SECONDS)
+        pipe.execute()
+        return True
+
+    def _write_to_db(self, user_ids: Iterable[int]) -> List[int]:
+        """Write the carts' current Redis state to Postgres; returns the user ids that failed."""
+        user_ids = list(user_ids)
+        pipe = self.redis.pipeline()
+        for user_id in user_ids:
+            pipe.hgetall(_meta_key(user_id))
+            pipe.hgetall(_items_key(user_id))
+        results = pipe.execute()
+        snapshots: Dict[int, tuple] = {
+            user_id: (results[2 * i], results[2 * i + 1])
+            for i, user_id in enumerate(user_ids)
+            if results[2 * i]
+        }
+        if not snapshots:
+            return []
+        self._drop_deleted_products(snapshots)
+
+        failed: List[int] = []
+        try:
+            cart_ids = self._write_carts(snapshots)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            # Tek bir sepet tüm partiyi düşürmesin: sepet sepet, savepoint ile yeniden dene
+            cart_ids = {}
+            for user_id, snapshot in snapshots.items():
+                try:
+                    with self.db.begin_nested():
+                        cart_ids.update(self._write_carts({user_id: snapshot}))
+                except IntegrityError as exc:
+                    logger.warning("Could not persist cart of user %s: %s", user_id, exc.orig)
+                    failed.append(user_id)
+            self.db.commit()
+
+        pipe = self.redis.pipeline()
+        for user_id, cart_id in cart_ids.items():
+            pipe.hset(_meta_key(user_id), "id", cart_id)
+        pipe.execute()
+        return failed
+
+    def _drop_deleted_products(self, snapshots: Dict[int, tuple]):
+        """Remove products deleted since they were added, from Redis and from `snapshots`."""
+        product_ids = {int(pid) for _, quantities in snapshots.values() for pid in quantities}
+        if not product_ids:
+            return
+        existing = {pid for (pid,) in self.db.query(Product.id).filter(Product.id.in_(product_ids))}
+        if len(existing) == len(product_ids):
+            return
+        pipe = self.redis.pipeline()
+        for user_id, (_, quantities) in snapshots.items():
+            stale = [pid for pid in quantities if int(pid) not in existing]
+            if stale:
+                pipe.hdel(_items_key(user_id), *stale)
+                for pid in stale:
+                    del quantities[pid]
+        pipe.execute()
+
+    def _write_carts(self, snapshots: Dict[int, tuple]) -> Dict[int, int]:
+        carts = {
+            cart.user_id: cart
+            for cart in self.db.query(Cart).filter(Cart.user_id.in_(snapshots)).all()
+        }
+        for user_id, (meta, _) in snapshots.items():
+            cart = carts.get(user_id)
+            if cart is None:
+                cart = Cart(user_id=user_id, created_at=datetime.fromisoformat(meta["created_at"]))
+                self.db.add(cart)
+                carts[user_id] = cart
+            cart.updated_at = datetime.fromisoformat(meta["updated_at"])
+        self.db.flush()
+
+        cart_ids = {user_id: cart.id for user_id, cart in carts.items()}
+        self.db.query(CartItem).filter(
+            CartItem.cart_id.in_(cart_ids.values())
+        ).delete(synchronize_session=False)
+        self.db.add_all([
+            CartItem(cart_id=cart_ids[user_id], product_id=int(pid), quantity=int(qty))
+            for user_id, (_, quantities) in snapshots.items()
+            for pid, qty in quantities.items()
+        ])
+        self.db.flush()
+        return cart_ids
+
+def flush_dirty_carts(db: Session, redis, batch_size: int = 500) -> int:
+    repo = RedisCartRepository(db, redis)
+    total = 0
+    while True:
+        flushed = repo.flush_dirty(batch_size)
+        total += flushed
+        if flushed < batch_size:
+            return total
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas.analytics import TopProduct, DailyRevenue, CategorySales
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.database import get_db
+from app.auth.jwt import check_permission
+
+router = APIRouter()
+
+@router.get("/analytics/top-products", response_model=List[TopProduct])
+def get_top_products(
+    days: int = Query(30, ge=1, le=366),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(check_permission("view_analytics"))
+):
+    repo = AnalyticsRepository(db)
+    return repo.top_products(days=days, limit=limit)
+
+@router.get("/analytics/daily-revenue", response_model=List[DailyRevenue])
+def get_daily_revenue(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(check_permission("view_analytics"))
+):
+    repo = AnalyticsRepository(db)
+    return repo.daily_revenue(days=days)
+
+@router.get("/analytics/category-sales", response_model=List[CategorySales])
+def get_category_sales(
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(check_permission("view_analytics"))
+):
+    repo = AnalyticsRepository(db)
+    return repo.category_sales(days=days)
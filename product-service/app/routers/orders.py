@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.schemas.order import Order, OrderCreate
 from app.repositories.order_repository import OrderRepository
+from app.repositories.cart_backend import get_cart_repository
 from app.database import get_db
 from app.auth.jwt import get_current_user, check_permission
+from app.services.order_events import event_stream
 
 router = APIRouter()
 
@@ -12,10 +15,14 @@ router = APIRouter()
 def create_order(
     order: OrderCreate,
     db: Session = Depends(get_db),
+    cart_repo=Depends(get_cart_repository),
     current_user: dict = Depends(get_current_user)
 ):
     repo = OrderRepository(db)
-    return repo.create_order(current_user["user_id"], order)
+    db_order = repo.create_order(current_user["user_id"], order)
+    # Redis sepeti checkout anında Postgres'e yazılır; hata siparişi bozmaz, periyodik flush'a kalır
+    cart_repo.persist(current_user["user_id"])
+    return db_order
 
 @router.get("/orders/", response_model=List[Order])
 def get_user_orders(
@@ -27,6 +34,19 @@ def get_user_orders(
     repo = OrderRepository(db)
     return repo.get_user_orders(current_user["user_id"], skip=skip, limit=limit)
 
+# /orders/{order_id}'den önce tanımlanmalı
+@router.get("/orders/stream")
+async def stream_order_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    return StreamingResponse(
+        event_stream(request, current_user["user_id"], last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/orders/{order_id}", response_model=Order)
 def get_order(
     order_id: int,
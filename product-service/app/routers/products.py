@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.schemas.product import Product, ProductCreate, ProductUpdate
+from typing import List, Optional
+from app.schemas.product import Product, ProductCreate, ProductUpdate, RecommendationBatchRequest
 from app.repositories.product_repository import ProductRepository
+from app.repositories.catalog_backend import get_product_reader
+from app.repositories.recommendation_repository import RecommendationRepository
 from app.database import get_db
 from app.auth.jwt import get_current_user, check_permission
 
@@ -12,11 +14,11 @@ router = APIRouter()
 def get_products(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    category_id: Optional[int] = None,
+    repo=Depends(get_product_reader),
     current_user: dict = Depends(get_current_user)
 ):
-    repo = ProductRepository(db)
-    return repo.get_products(skip=skip, limit=limit)
+    return repo.get_products(skip=skip, limit=limit, category_id=category_id)
 
 @router.post("/products/", response_model=Product)
 def create_product(
@@ -30,10 +32,9 @@ def create_product(
 @router.get("/products/{product_id}", response_model=Product)
 def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    repo=Depends(get_product_reader),
     current_user: dict = Depends(get_current_user)
 ):
-    repo = ProductRepository(db)
     product = repo.get_product(product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -61,4 +62,31 @@ def delete_product(
     repo = ProductRepository(db)
     if not repo.delete_product(product_id):
         raise HTTPException(status_code=404, detail="Product not found")
-    return {"message": "Product deleted"} 
\ No newline at end of file
+    return {"message": "Product deleted"}
+
+def _active_products_in_order(reader, product_ids: List[int]):
+    products = {p.id: p for p in reader.get_products_by_ids(product_ids)}
+    return [products[pid] for pid in product_ids if pid in products and products[pid].is_active]
+
+@router.get("/products/{product_id}/recommendations", response_model=List[Product])
+def get_product_recommendations(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    reader=Depends(get_product_reader),
+    current_user: dict = Depends(get_current_user)
+):
+    repo = RecommendationRepository(db)
+    return _active_products_in_order(reader, repo.get_recommendations(product_id, limit=limit))
+
+@router.post("/products/recommendations", response_model=List[Product])
+def get_batch_recommendations(
+    request: RecommendationBatchRequest,
+    db: Session = Depends(get_db),
+    reader=Depends(get_product_reader),
+    current_user: dict = Depends(get_current_user)
+):
+    repo = RecommendationRepository(db)
+    return _active_products_in_order(
+        reader, repo.get_batch_recommendations(request.product_ids, limit=request.limit)
+    )
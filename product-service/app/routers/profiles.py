@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from app.auth.jwt import check_permission
+from ecommerce_common.profiling import profile_store
+
+router = APIRouter()
+
+@router.get("/admin/profiles/")
+def list_profiles(current_user: dict = Depends(check_permission("view_profiles"))):
+    return profile_store.list()
+
+@router.get("/admin/profiles/{name}")
+def download_profile(
+    name: str,
+    current_user: dict = Depends(check_permission("view_profiles"))
+):
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
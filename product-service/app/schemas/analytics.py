@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import date
+
+class TopProduct(BaseModel):
+    product_id: int
+    name: str
+    quantity: int
+    revenue: float
+
+class DailyRevenue(BaseModel):
+    day: date
+    quantity: int
+    revenue: float
+
+class CategorySales(BaseModel):
+    category_id: int
+    name: str
+    quantity: int
+    revenue: float
@@ -40,4 +40,8 @@ class Product(ProductBase):
     categories: List[Category]
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class RecommendationBatchRequest(BaseModel):
+    product_ids: List[int] = Field(max_length=200)
+    limit: int = Field(10, ge=1, le=50)
@@ -0,0 +1,646 @@
+"""Optional per-process snapshot of the product catalog.
+
+With CATALOG_SNAPSHOT_ENABLED=true every worker loads products and
+categories into memory in the background at startup and serves product
+listing, detail and batch lookups from it; until it is ready (or if it is
+disabled for exceeding its bounds) reads go to the database as before.
+
+Products are stored column-wise: numbers in typed arrays aligned with a
+sorted id array, names and descriptions packed into one UTF-8 buffer, and
+category memberships as shared tuples. Writes made through
+ProductRepository and OrderRepository are applied locally and announced to
+other workers over Postgres NOTIFY; a periodic reconcile catches anything
+missed and re-reads categories, which are only changed in the database.
+
+The snapshot is dropped (and reads go back to the database) whenever it
+grows past CATALOG_MAX_PRODUCTS or CATALOG_MAX_MEMORY_MB. Measure the memory
+the real load path uses with:
+
+    python -m app.services.catalog --measure 1000000
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ecommerce_common.metrics import metrics
+from app.models.product import Category, Product, product_category
+from app.services.pg_notify import NotifyListener, notify, notify_available
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "false").lower() == "true"
+CATALOG_MAX_PRODUCTS = int(os.getenv("CATALOG_MAX_PRODUCTS", "2000000"))
+CATALOG_MAX_MEMORY_MB = int(os.getenv("CATALOG_MAX_MEMORY_MB", "1024"))
+CATALOG_RECONCILE_SECONDS = float(os.getenv("CATALOG_RECONCILE_SECONDS", "60"))
+
+CHANNEL = "catalog_changes"
+LOAD_BATCH_SIZE = 10000
+NOTIFY_IDS_PER_MESSAGE = 500  # NOTIFY yükü 8000 baytla sınırlı
+# Uygulama sunucuları arasındaki saat farkı için pay
+RECONCILE_MARGIN = timedelta(seconds=5)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    return ((value - EPOCH).days * 86400 + value.hour * 3600 + value.minute * 60 + value.second) * 1000000 \
+        + value.microsecond
+
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+class SnapshotUnavailable(Exception):
+    """The snapshot was dropped after the caller chose it; read from the database."""
+
+
+class StringColumn:
+    """Strings packed into one UTF-8 buffer; each row is an (offset, length) pair.
+
+    Overwritten and deleted values are left behind as garbage and compacted
+    away once they make up half the buffer.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q")
+        self.lengths = array("l")
+        self.garbage = 0
+
+    def _pack(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, -1
+        encoded = value.encode()
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+
+    def append(self, value: Optional[str]):
+        offset, length = self._pack(value)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+    def insert(self, row: int, value: Optional[str]):
+        offset, length = self._pack(value)
+        self.offsets.insert(row, offset)
+        self.lengths.insert(row, length)
+
+    def set(self, row: int, value: Optional[str]):
+        self.garbage += max(self.lengths[row], 0)
+        self.offsets[row], self.lengths[row] = self._pack(value)
+        self._maybe_compact()
+
+    def delete(self, row: int):
+        self.garbage += max(self.lengths[row], 0)
+        del self.offsets[row]
+        del self.lengths[row]
+        self._maybe_compact()
+
+    def get(self, row: int) -> Optional[str]:
+        length = self.lengths[row]
+        if length < 0:
+            return None
+        offset = self.offsets[row]
+        return self.data[offset:offset + length].decode()
+
+    def _maybe_compact(self):
+        if self.garbage > 1 << 20 and self.garbage * 2 > len(self.data):
+            values = [self.get(row) for row in range(len(self.offsets))]
+            self.data = bytearray()
+            self.garbage = 0
+            for row, value in enumerate(values):
+                self.offsets[row], self.lengths[row] = self._pack(value)
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets) + self.lengths.itemsize * len(self.lengths)
+
+
+class CategoryView:
+    __slots__ = ("id", "name", "description")
+
+    def __init__(self, id: int, name: str, description: Optional[str]):
+        self.id = id
+        self.name = name
+        self.description = description
+
+
+class ProductView:
+    """Read-only product built from a snapshot row; serialises like the ORM model."""
+
+    __slots__ = ("id", "name", "description", "price", "stock", "is_active",
+                 "created_at", "updated_at", "categories")
+
+    def __init__(self, id, name, description, price, stock, is_active, created_at, updated_at, categories):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.stock = stock
+        self.is_active = is_active
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.categories = categories
+
+
+ProductRow = Tuple[int, str, Optional[str], float, int, bool, Optional[datetime], Optional[datetime]]
+
+
+class CatalogData:
+    """Column store for one version of the catalog. Not thread-safe on its own."""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.prices = array("d")
+        self.stocks = array("q")
+        self.active = bytearray()
+        self.created_at = array("q")
+        self.updated_at = array("q")
+        self.names = StringColumn()
+        self.descriptions = StringColumn()
+        self.product_categories: List[Tuple[int, ...]] = []
+        self.by_category: Dict[int, array] = {}
+        self.categories: Dict[int, CategoryView] = {}
+        # Aynı kategori kombinasyonları tek tuple'ı paylaşır
+        self._combos: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _row(self, product_id: int) -> Optional[int]:
+        row = bisect_left(self.ids, product_id)
+        return row if row < len(self.ids) and self.ids[row] == product_id else None
+
+    def upsert(self, values: ProductRow, category_ids: Iterable[int]):
+        product_id, name, description, price, stock, is_active, created_at, updated_at = values
+        combo = tuple(sorted(set(category_ids)))
+        combo = self._combos.setdefault(combo, combo)
+        if not self.ids or product_id > self.ids[-1]:
+            # Toplu yükleme ve yeni ürünler: id'ler artan sırada gelir, sona eklenir
+            self._append(product_id, name, description, price, stock, is_active, created_at, updated_at, combo)
+            return
+        row = self._row(product_id)
+        if row is None:
+            row = bisect_left(self.ids, product_id)
+            self.ids.insert(row, product_id)
+            self.prices.insert(row, price)
+            self.stocks.insert(row, stock)
+            self.active.insert(row, bool(is_active))
+            self.created_at.insert(row, _to_micros(created_at))
+            self.updated_at.insert(row, _to_micros(updated_at))
+            self.names.insert(row, name)
+            self.descriptions.insert(row, description)
+            self.product_categories.insert(row, combo)
+            old_combo: Tuple[int, ...] = ()
+        else:
+            self.prices[row] = price
+            self.stocks[row] = stock
+            self.active[row] = bool(is_active)
+            self.created_at[row] = _to_micros(created_at)
+            self.updated_at[row] = _to_micros(updated_at)
+            if self.names.get(row) != name:
+                self.names.set(row, name)
+            if self.descriptions.get(row) != description:
+                self.descriptions.set(row, description)
+            old_combo = self.product_categories[row]
+            self.product_categories[row] = combo
+        self._reindex(product_id, old_combo, combo)
+
+    def _append(self, product_id, name, description, price, stock, is_active, created_at, updated_at, combo):
+        self.ids.append(product_id)
+        self.prices.append(price)
+        self.stocks.append(stock)
+        self.active.append(bool(is_active))
+        self.created_at.append(_to_micros(created_at))
+        self.updated_at.append(_to_micros(updated_at))
+        self.names.append(name)
+        self.descriptions.append(description)
+        self.product_categories.append(combo)
+        for category_id in combo:
+            ids = self.by_category.get(category_id)
+            if ids is None:
+                ids = self.by_category[category_id] = array("q")
+            ids.append(product_id)
+
+    def remove(self, product_id: int) -> bool:
+        row = self._row(product_id)
+        if row is None:
+            return False
+        self._reindex(product_id, self.product_categories[row], ())
+        for column in (self.ids, self.prices, self.stocks, self.active,
+                       self.created_at, self.updated_at, self.product_categories):
+            del column[row]
+        self.names.delete(row)
+        self.descriptions.delete(row)
+        return True
+
+    def _reindex(self, product_id: int, old: Tuple[int, ...], new: Tuple[int, ...]):
+        for category_id in set(old) - set(new):
+            ids = self.by_category[category_id]
+            del ids[bisect_left(ids, product_id)]
+        for category_id in set(new) - set(old):
+            ids = self.by_category.setdefault(category_id, array("q"))
+            ids.insert(bisect_left(ids, product_id), product_id)
+
+    def view(self, row: int) -> ProductView:
+        return ProductView(
+            id=self.ids[row],
+            name=self.names.get(row),
+            description=self.descriptions.get(row),
+            price=self.prices[row],
+            stock=self.stocks[row],
+            is_active=bool(self.active[row]),
+            created_at=_from_micros(self.created_at[row]),
+            updated_at=_from_micros(self.updated_at[row]),
+            categories=[self.categories[c] for c in self.product_categories[row] if c in self.categories],
+        )
+
+    def get(self, product_id: int) -> Optional[ProductView]:
+        row = self._row(product_id)
+        return self.view(row) if row is not None else None
+
+    def page(self, skip: int, limit: int, category_id: Optional[int] = None) -> List[ProductView]:
+        if category_id is None:
+            return [self.view(row) for row in range(skip, min(skip + limit, len(self.ids)))]
+        ids = self.by_category.get(category_id, array("q"))[skip:skip + limit]
+        return [self.view(self._row(product_id)) for product_id in ids]
+
+    def max_updated_at(self) -> Optional[datetime]:
+        return _from_micros(max(self.updated_at)) if self.updated_at else None
+
+    def nbytes(self) -> int:
+        """Approximate memory held, excluding the shared category tuples."""
+        arrays = [self.ids, self.prices, self.stocks, self.created_at, self.updated_at]
+        arrays += list(self.by_category.values())
+        return (
+            sum(a.itemsize * len(a) for a in arrays)
+            + len(self.active)
+            + self.names.nbytes()
+            + self.descriptions.nbytes()
+            + 8 * len(self.product_categories)
+        )
+
+
+class CatalogSnapshot:
+    def __init__(self, max_products: int = CATALOG_MAX_PRODUCTS, max_memory_mb: int = CATALOG_MAX_MEMORY_MB):
+        self.max_products = max_products
+        self.max_bytes = max_memory_mb << 20
+        self.version = 0
+        self.verified_at = 0.0
+        self._data: Optional[CatalogData] = None
+        self._lock = threading.RLock()
+        self._loading = False
+        self._pending: set = set()
+
+    @property
+    def ready(self) -> bool:
+        return self._data is not None
+
+    # Okuma yolu: ProductRepository ile aynı imzalar
+
+    def _current(self) -> CatalogData:
+        # Okuyucu seçildikten sonra snapshot sınırları aşıp bırakılmış olabilir
+        if self._data is None:
+            raise SnapshotUnavailable()
+        return self._data
+
+    def get_product(self, product_id: int) -> Optional[ProductView]:
+        with self._lock:
+            return self._current().get(product_id)
+
+    def get_products(self, skip: int = 0, limit: int = 100, category_id: Optional[int] = None) -> List[ProductView]:
+        with self._lock:
+            return self._current().page(skip, limit, category_id)
+
+    def get_products_by_ids(self, product_ids: List[int]) -> List[ProductView]:
+        with self._lock:
+            data = self._current()
+            views = (data.get(product_id) for product_id in set(product_ids))
+            return [view for view in views if view is not None]
+
+    def staleness(self) -> Optional[float]:
+        """Seconds since the snapshot was last known to match the database."""
+        return time.time() - self.verified_at if self._data is not None else None
+
+    # Yükleme ve güncelleme
+
+    def load(self, db: Session):
+        """Build a fresh copy from the database and swap it in."""
+        with self._lock:
+            self._loading = True
+            self._pending = set()
+        try:
+            started = time.perf_counter()
+            data = self._build(db)
+        except Exception:
+            with self._lock:
+                self._loading = False
+            raise
+        with self._lock:
+            self._loading = False
+            pending, self._pending = self._pending, set()
+            self._swap(data)
+        if data is not None:
+            # Yükleme sırasında gelen değişiklikler yeni kopyaya uygulanır
+            self.refresh(db, pending)
+            logger.info("Catalog snapshot loaded: %d products in %.1fs, ~%.0f MB",
+                        len(data), time.perf_counter() - started, data.nbytes() / (1 << 20))
+
+    def _build(self, db: Session) -> Optional[CatalogData]:
+        total = db.query(func.count(Product.id)).scalar()
+        if total > self.max_products:
+            logger.warning("Catalog snapshot disabled: %d products exceeds CATALOG_MAX_PRODUCTS=%d",
+                           total, self.max_products)
+            return None
+        data = CatalogData()
+        data.categories = _load_categories(db)
+        # Kategori bağlantıları ürün satırlarıyla birlikte akar; ayrı bir sözlükte biriktirilmez
+        rows = db.execute(
+            _product_columns(product_category.c.category_id)
+            .outerjoin(product_category, product_category.c.product_id == Product.id)
+            .order_by(Product.id)
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            data.upsert(tuple(group[0][:-1]), [row[-1] for row in group if row[-1] is not None])
+            if len(data) % LOAD_BATCH_SIZE == 0 and self._too_big(data):
+                return None
+        return None if self._too_big(data) else data
+
+    def _too_big(self, data: CatalogData) -> bool:
+        if len(data) > self.max_products:
+            logger.warning("Catalog snapshot disabled: grew past CATALOG_MAX_PRODUCTS=%d", self.max_products)
+            return True
+        if data.nbytes() > self.max_bytes:
+            logger.warning("Catalog snapshot disabled: exceeds CATALOG_MAX_MEMORY_MB=%d", self.max_bytes >> 20)
+            return True
+        return False
+
+    def _swap(self, data: Optional[CatalogData]):
+        self._data = data
+        self.version += 1
+        self.verified_at = time.time()
+        metrics.inc("catalog_snapshot_loads_total")
+        metrics.set_gauge("catalog_snapshot_version", self.version)
+        metrics.set_gauge("catalog_snapshot_products", len(data) if data is not None else 0)
+        metrics.set_gauge("catalog_snapshot_bytes", data.nbytes() if data is not None else 0)
+
+    def refresh(self, db: Session, product_ids: Iterable[int]):
+        """Re-read the given products; ids no longer in the database are removed."""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+        with self._lock:
+            if self._loading:
+                self._pending |= product_ids
+                return
+            if self._data is None:
+                return
+        links: Dict[int, List[int]] = {}
+        for product_id, category_id in db.execute(
+            select(product_category.c.product_id, product_category.c.category_id)
+            .where(product_category.c.product_id.in_(product_ids))
+        ):
+            links.setdefault(product_id, []).append(category_id)
+        rows = db.execute(_product_columns().where(Product.id.in_(product_ids))).all()
+        with self._lock:
+            known = self._data.categories.keys() if self._data is not None else ()
+            unknown = {c for ids in links.values() for c in ids} - set(known)
+        # Yeni kategoriler ürünle birlikte görünsün
+        categories = _load_categories(db, unknown) if unknown else {}
+        with self._lock:
+            data = self._data
+            if data is None:
+                return
+            data.categories.update(categories)
+            for values in rows:
+                data.upsert(tuple(values), links.get(values[0], ()))
+            for product_id in product_ids - {values[0] for values in rows}:
+                data.remove(product_id)
+            self.version += 1
+            self.verified_at = time.time()
+            if self._too_big(data):
+                self._data = None
+            metrics.set_gauge("catalog_snapshot_version", self.version)
+            metrics.set_gauge("catalog_snapshot_products", len(data) if self._data is not None else 0)
+            metrics.set_gauge("catalog_snapshot_bytes", data.nbytes() if self._data is not None else 0)
+
+    def reconcile(self, db: Session):
+        """Pick up changes the feed missed; reload if products were deleted behind our back."""
+        with self._lock:
+            if self._data is None or self._loading:
+                return
+            since = self._data.max_updated_at()
+        categories = _load_categories(db)
+        with self._lock:
+            if self._data is not None:
+                # İsim değişiklikleri ve silinen kategoriler
+                self._data.categories = categories
+        if since is not None:
+            changed = db.execute(select(Product.id).where(Product.updated_at >= since - RECONCILE_MARGIN)).scalars()
+            self.refresh(db, changed)
+        total = db.query(func.count(Product.id)).scalar()
+        with self._lock:
+            in_sync = self._data is not None and len(self._data) == total
+        if in_sync:
+            self.verified_at = time.time()
+        else:
+            logger.warning("Catalog snapshot out of sync with the database, reloading")
+            self.load(db)
+
+
+def _load_categories(db: Session, category_ids: Optional[Iterable[int]] = None) -> Dict[int, CategoryView]:
+    query = db.query(Category.id, Category.name, Category.description)
+    if category_ids is not None:
+        query = query.filter(Category.id.in_(category_ids))
+    return {id: CategoryView(id, name, description) for id, name, description in query}
+
+
+def _product_columns(*extra):
+    return select(
+        Product.id, Product.name, Product.description, Product.price, Product.stock,
+        Product.is_active, Product.created_at, Product.updated_at, *extra,
+    )
+
+
+catalog = CatalogSnapshot()
+metrics.gauge_function("catalog_snapshot_staleness_seconds", catalog.staleness)
+_listener: Optional[NotifyListener] = None
+# Kendi NOTIFY'larımızı tanımak için süreç kimliği; pid container'lar arasında çakışır
+_origin = uuid.uuid4().hex
+
+
+def _new_origin():
+    global _origin
+    _origin = uuid.uuid4().hex
+
+
+# preload_app ile modül master'da yüklenir; her worker kendi kimliğini almalı
+os.register_at_fork(after_in_child=_new_origin)
+
+
+def products_changed(db: Session, product_ids: Iterable[int]):
+    """Apply committed product writes to this worker's snapshot and announce them to the others."""
+    if not CATALOG_SNAPSHOT_ENABLED:
+        return
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return
+    catalog.refresh(db, product_ids)
+    if notify_available():
+        for start in range(0, len(product_ids), NOTIFY_IDS_PER_MESSAGE):
+            notify(db, CHANNEL, json.dumps({
+                "origin": _origin,
+                "at": time.time(),
+                "ids": product_ids[start:start + NOTIFY_IDS_PER_MESSAGE],
+            }))
+        db.commit()
+
+
+def _session() -> Session:
+    from app.database import SessionLocal
+
+    return SessionLocal()
+
+
+def _receive(payload: str):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed catalog change: %r", payload)
+        return
+    if message.get("origin") == _origin:
+        return
+    db = _session()
+    try:
+        catalog.refresh(db, message.get("ids", ()))
+    finally:
+        db.close()
+    metrics.set_gauge("catalog_change_lag_seconds", max(0.0, time.time() - message.get("at", time.time())))
+
+
+def load_snapshot():
+    db = _session()
+    try:
+        catalog.load(db)
+    finally:
+        db.close()
+
+
+def reconcile_snapshot():
+    db = _session()
+    try:
+        catalog.reconcile(db)
+    finally:
+        db.close()
+
+
+def _on_reconnect():
+    # Bağlantı koptuysa kaçan değişiklikler reconcile ile toplanır
+    if catalog.ready:
+        reconcile_snapshot()
+
+
+def start():
+    """Start the change feed; the caller runs `load_snapshot` (blocking) in the background."""
+    global _listener
+    if notify_available():
+        _listener = NotifyListener(CHANNEL, _receive, on_reconnect=_on_reconnect)
+        _listener.start()
+
+
+def stop():
+    if _listener is not None:
+        _listener.stop()
+
+
+def measure(count: int, name_length: int = 40, description_length: int = 200, categories: int = 50):
+    """Load a synthetic catalog of `count` products through the real load path
+    (from an in-memory SQLite database) and report its memory use."""
+    import importlib
+    import random
+    import tracemalloc
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.pool import StaticPool
+
+    # Product ilişkilerindeki mapper'lar kayıtlı olsun
+    for module in ("cart", "order"):
+        importlib.import_module(f"app.models.{module}")
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    tables = [Category.__table__, Product.__table__, product_category]
+    Product.metadata.create_all(engine, tables=tables)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    name = "n" * name_length
+    description = "d" * description_length
+    with engine.begin() as conn:
+        conn.execute(insert(Category.__table__), [
+            {"id": category_id, "name": f"category-{category_id}"} for category_id in range(1, categories + 1)
+        ])
+        for first in range(1, count + 1, LOAD_BATCH_SIZE):
+            ids = range(first, min(first + LOAD_BATCH_SIZE, count + 1))
+            conn.execute(insert(Product.__table__), [
+                {"id": product_id, "name": name, "description": description, "price": rng.uniform(1, 1000),
+                 "stock": rng.randint(0, 500), "is_active": True, "created_at": now, "updated_at": now}
+                for product_id in ids
+            ])
+            conn.execute(insert(product_category), [
+                {"product_id": product_id, "category_id": category_id}
+                for product_id in ids
+                for category_id in rng.sample(range(1, categories + 1), rng.randint(1, 3))
+            ])
+
+    snapshot = CatalogSnapshot(max_products=count, max_memory_mb=1 << 20)
+    db = Session(engine)
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = snapshot._build(db)
+    load_seconds = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+
+    lookups = [rng.randint(1, count) for _ in range(100000)]
+    started = time.perf_counter()
+    for product_id in lookups:
+        data.get(product_id)
+    lookup_us = (time.perf_counter() - started) / len(lookups) * 1e6
+    return {
+        "products": count,
+        "retained_mb": round(retained / (1 << 20), 1),
+        "peak_mb": round(peak / (1 << 20), 1),
+        "estimated_mb": round(data.nbytes() / (1 << 20), 1),
+        "bytes_per_product": round(retained / count, 1),
+        "load_seconds_traced": round(load_seconds, 1),
+        "lookup_us": round(lookup_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure catalog snapshot memory use")
+    parser.add_argument("--measure", type=int, default=1000000, help="number of synthetic products")
+    parser.add_argument("--name-length", type=int, default=40)
+    parser.add_argument("--description-length", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.measure, args.name_length, args.description_length), indent=2))
+
+
+if __name__ == "__main__":
+    main()
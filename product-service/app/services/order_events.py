@@ -0,0 +1,238 @@
+"""Order status changes pushed to clients over server-sent events.
+
+Each worker keeps the last ORDER_EVENTS_BUFFER_SIZE events in a ring so a
+reconnecting client can resume from Last-Event-ID. With the default `memory`
+backend events only reach streams held by the publishing worker; `postgres`
+(LISTEN/NOTIFY) and `redis` (pub/sub) fan them out to every worker.
+
+An idle stream is one queue and one suspended coroutine: no DB session, no
+thread, and a comment line every ORDER_EVENTS_HEARTBEAT_SECONDS to keep
+proxies from closing it.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.cache.redis_client import PubSubListener, get_redis
+from ecommerce_common.metrics import metrics
+from app.services.pg_notify import NotifyListener, notify, notify_available
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_BACKEND = os.getenv("ORDER_EVENTS_BACKEND", "memory")  # memory | postgres | redis
+ORDER_EVENTS_BUFFER_SIZE = int(os.getenv("ORDER_EVENTS_BUFFER_SIZE", "1000"))
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100"))
+ORDER_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("ORDER_EVENTS_HEARTBEAT_SECONDS", "15"))
+ORDER_EVENTS_RETRY_MS = int(os.getenv("ORDER_EVENTS_RETRY_MS", "3000"))
+
+CHANNEL = "order_events"
+
+_id_lock = threading.Lock()
+_last_id = 0
+
+
+def next_event_id() -> int:
+    """Microsecond timestamp, strictly increasing within the process.
+
+    Ids come from the publishing worker's clock, so every worker's ring
+    orders the same event the same way and Last-Event-ID works on any worker.
+    """
+    global _last_id
+    with _id_lock:
+        _last_id = max(_last_id + 1, time.time_ns() // 1000)
+        return _last_id
+
+
+class OrderEvent:
+    __slots__ = ("id", "order_id", "user_id", "status", "previous_status", "created_at")
+
+    def __init__(self, id: int, order_id: int, user_id: int, status: str,
+                 previous_status: Optional[str], created_at: str):
+        self.id = id
+        self.order_id = order_id
+        self.user_id = user_id
+        self.status = status
+        self.previous_status = previous_status
+        self.created_at = created_at
+
+    def to_json(self) -> str:
+        return json.dumps({name: getattr(self, name) for name in self.__slots__})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "OrderEvent":
+        return cls(**json.loads(payload))
+
+    def to_sse(self) -> str:
+        data = json.dumps({
+            "order_id": self.order_id,
+            "status": self.status,
+            "previous_status": self.previous_status,
+            "created_at": self.created_at,
+        })
+        return f"id: {self.id}\nevent: order_status\ndata: {data}\n\n"
+
+
+class Subscription:
+    __slots__ = ("user_id", "queue")
+
+    def __init__(self, user_id: int, queue: asyncio.Queue):
+        self.user_id = user_id
+        self.queue = queue
+
+
+class OrderEventBroker:
+    """Fans events out to the streams of their user. All methods except
+    `publish_threadsafe` must run on the event loop thread."""
+
+    def __init__(self, buffer_size: int = ORDER_EVENTS_BUFFER_SIZE, queue_size: int = ORDER_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._buffer: Deque[OrderEvent] = deque(maxlen=buffer_size)
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._connections = 0
+        # Bu id'den eskisine kadar olayların tamamı elimizde değil (açılış ya da ring taşması)
+        self._horizon = next_event_id()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        # preload_app ile broker master'da kurulur; ring bu worker'da boş başlar
+        self._buffer.clear()
+        self._horizon = next_event_id()
+        self._loop = loop
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.Queue(self.queue_size))
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self._connections += 1
+        metrics.set_gauge("order_stream_connections", self._connections)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+        self._connections -= 1
+        metrics.set_gauge("order_stream_connections", self._connections)
+
+    def replay(self, user_id: int, last_event_id: int) -> Optional[List[OrderEvent]]:
+        """Buffered events after `last_event_id`, or None if some may have been lost."""
+        if last_event_id < self._horizon:
+            return None
+        return [e for e in self._buffer if e.user_id == user_id and e.id > last_event_id]
+
+    def dispatch(self, event: OrderEvent):
+        if len(self._buffer) == self._buffer.maxlen:
+            self._horizon = max(self._horizon, self._buffer[0].id)
+        self._buffer.append(event)
+        for subscription in list(self._subscriptions.get(event.user_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Yavaş istemci: akışı kapat, Last-Event-ID ile ring'den devam eder
+                self.unsubscribe(subscription)
+                subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+                metrics.inc("order_stream_overflows_total")
+
+    def publish_threadsafe(self, event: OrderEvent):
+        if self._loop is None:
+            logger.warning("Order event %s dropped: broker is not running", event.id)
+            return
+        self._loop.call_soon_threadsafe(self.dispatch, event)
+
+    def receive(self, payload: str):
+        """Listener callback for events published by any worker."""
+        try:
+            event = OrderEvent.from_json(payload)
+        except (ValueError, TypeError):
+            logger.warning("Ignoring malformed order event: %r", payload)
+            return
+        self.publish_threadsafe(event)
+
+
+broker = OrderEventBroker()
+_listener = None
+
+
+def start(loop: asyncio.AbstractEventLoop):
+    global _listener
+    broker.bind(loop)
+    if ORDER_EVENTS_BACKEND == "postgres" and notify_available():
+        _listener = NotifyListener(CHANNEL, broker.receive)
+    elif ORDER_EVENTS_BACKEND == "redis":
+        _listener = PubSubListener(CHANNEL, broker.receive)
+    if _listener is not None:
+        _listener.start()
+
+
+def stop():
+    if _listener is not None:
+        _listener.stop()
+
+
+def publish_status_change(db: Session, order, previous_status: Optional[str]):
+    event = OrderEvent(
+        id=next_event_id(),
+        order_id=order.id,
+        user_id=order.user_id,
+        status=order.status,
+        previous_status=previous_status,
+        created_at=datetime.utcnow().isoformat(),
+    )
+    if ORDER_EVENTS_BACKEND == "postgres" and notify_available():
+        notify(db, CHANNEL, event.to_json())
+        db.commit()
+    elif ORDER_EVENTS_BACKEND == "redis":
+        get_redis().publish(CHANNEL, event.to_json())
+    else:
+        broker.publish_threadsafe(event)
+    metrics.inc("order_events_published_total")
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def event_stream(request, user_id: int, last_event_id: Optional[str] = None):
+    # Replay'den önce abone olunur ki arada gelen olay kaçmasın
+    subscription = broker.subscribe(user_id)
+    try:
+        yield f"retry: {ORDER_EVENTS_RETRY_MS}\n\n"
+        seen = _parse_event_id(last_event_id)
+        if seen is not None:
+            replayed = broker.replay(user_id, seen)
+            if replayed is None:
+                # İstemci siparişlerini yeniden çekmeli
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                for event in replayed:
+                    seen = event.id
+                    yield event.to_sse()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), ORDER_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                return
+            if seen is not None and event.id <= seen:
+                continue
+            yield event.to_sse()
+    finally:
+        broker.unsubscribe(subscription)
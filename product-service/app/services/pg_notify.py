@@ -0,0 +1,79 @@
+"""Postgres LISTEN/NOTIFY helpers shared by the cross-worker event feeds."""
+import logging
+import select
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+def notify_available() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def notify(db: Session, channel: str, payload: str):
+    """Queue a NOTIFY on the session's transaction; it is delivered on commit."""
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class NotifyListener:
+    """Background thread that LISTENs on one channel and hands payloads to `callback`.
+
+    The connection is dedicated (not pooled) and is re-opened after errors;
+    `on_reconnect` runs after each reconnect so the caller can catch up on
+    anything missed while the connection was down.
+    """
+
+    def __init__(self, channel: str, callback: Callable[[str], None],
+                 on_reconnect: Optional[Callable[[], None]] = None, retry_seconds: float = 5.0):
+        self.channel = channel
+        self.callback = callback
+        self.on_reconnect = on_reconnect
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"listen-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.retry_seconds + 1)
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+        conn.autocommit = True
+        conn.cursor().execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _run(self):
+        conn = None
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = self._connect()
+                    if self.on_reconnect is not None:
+                        self.on_reconnect()
+                # Kısa select aralığı: stop() en geç 1 sn içinde fark edilir
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.callback(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("LISTEN %s failed, reconnecting in %ss", self.channel, self.retry_seconds)
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                self._stop.wait(self.retry_seconds)
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,56 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+def build_cooccurrence(order_ids: np.ndarray, product_ids: np.ndarray) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Product x product matrix counting the orders two products appear in together.
+
+    Returns the matrix and the product id of each row/column.
+    """
+    products, product_idx = np.unique(product_ids, return_inverse=True)
+    orders, order_idx = np.unique(order_ids, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(product_idx), dtype=np.int32), (order_idx, product_idx)),
+        shape=(len(orders), len(products)),
+    )
+    # Aynı üründen birden fazla satır varsa 1 say
+    incidence.data[:] = 1
+    cooccurrence = (incidence.T @ incidence).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+    return cooccurrence, products
+
+
+def top_k_neighbours(cooccurrence: sparse.csr_matrix, products: np.ndarray, k: int) -> Dict[int, List[List[int]]]:
+    result = {}
+    indptr, indices, data = cooccurrence.indptr, cooccurrence.indices, cooccurrence.data
+    for row in range(cooccurrence.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        counts = data[start:end]
+        neighbours = products[indices[start:end]]
+        if end - start > k:
+            # k'inci sayıya eşit olanların hepsi aday: sınırdaki eşitlik de ürün id'siyle çözülsün
+            threshold = -np.partition(-counts, k - 1)[k - 1]
+            top = np.flatnonzero(counts >= threshold)
+        else:
+            top = np.arange(end - start)
+        # Eşit sayılarda ürün id'sine göre sabit sıra
+        top = top[np.lexsort((neighbours[top], -counts[top]))][:k]
+        result[int(products[row])] = [[int(neighbours[i]), int(counts[i])] for i in top]
+    return result
+
+
+def merge_neighbours(current: List[List[int]], updated: Dict[int, int], k: int) -> List[List[int]]:
+    """Fold new pair counts into an existing top-K list.
+
+    Counts only grow, so anything outside the old top-K that was not just
+    updated cannot overtake it; the merge is exact.
+    """
+    counts = {product_id: count for product_id, count in current}
+    counts.update(updated)
+    ranked = sorted(counts.items(), key=lambda pair: (-pair[1], pair[0]))[:k]
+    return [[product_id, count] for product_id, count in ranked]
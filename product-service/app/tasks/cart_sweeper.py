@@ -0,0 +1,108 @@
+"""Delete carts that have been idle longer than a configurable age.
+
+Usage: python -m app.tasks.cart_sweeper [--max-idle-days 30] [--batch-size 1000]
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.cart import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+CART_MAX_IDLE_DAYS = float(os.getenv("CART_MAX_IDLE_DAYS", "30"))
+CART_SWEEP_BATCH_SIZE = int(os.getenv("CART_SWEEP_BATCH_SIZE", "1000"))
+CART_SWEEP_INTERVAL_SECONDS = float(os.getenv("CART_SWEEP_INTERVAL_SECONDS", "0"))  # 0: kapalı
+
+
+def sweep_abandoned_carts(
+    db: Session,
+    max_idle: timedelta = timedelta(days=CART_MAX_IDLE_DAYS),
+    batch_size: int = CART_SWEEP_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    pause: float = 0.0,
+) -> dict:
+    """Delete carts (and their items) not updated within `max_idle`.
+
+    Each batch is its own short transaction touching at most `batch_size`
+    carts, so locks are held briefly and the sweep can be interrupted.
+    """
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - max_idle
+    carts_deleted = items_deleted = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        candidates = select(Cart.id).where(Cart.updated_at < cutoff).order_by(Cart.id).limit(batch_size)
+        if db.bind.dialect.name == "postgresql":
+            candidates = candidates.with_for_update(skip_locked=True)
+        cart_ids = db.execute(candidates).scalars().all()
+        if not cart_ids:
+            db.rollback()
+            break
+
+        items_deleted += db.execute(
+            delete(CartItem).where(CartItem.cart_id.in_(cart_ids))
+        ).rowcount
+        carts_deleted += db.execute(
+            delete(Cart).where(Cart.id.in_(cart_ids))
+        ).rowcount
+        db.commit()
+        batches += 1
+
+        if len(cart_ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    result = {
+        "carts_deleted": carts_deleted,
+        "items_deleted": items_deleted,
+        "batches": batches,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Cart sweep finished: %s", result)
+    return result
+
+
+def run_sweep() -> dict:
+    db = SessionLocal()
+    try:
+        return sweep_abandoned_carts(db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete abandoned carts in bounded batches")
+    parser.add_argument("--max-idle-days", type=float, default=CART_MAX_IDLE_DAYS)
+    parser.add_argument("--batch-size", type=int, default=CART_SWEEP_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = sweep_abandoned_carts(
+            db,
+            max_idle=timedelta(days=args.max_idle_days),
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            pause=args.pause,
+        )
+    finally:
+        db.close()
+    print(
+        f"Deleted {result['carts_deleted']} carts and {result['items_deleted']} cart items "
+        f"in {result['batches']} batches ({result['seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
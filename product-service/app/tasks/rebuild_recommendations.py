@@ -0,0 +1,22 @@
+"""Recompute product co-occurrence counts and top-K recommendations from order_items.
+
+Usage: python -m app.tasks.rebuild_recommendations
+"""
+import time
+
+from app.database import SessionLocal
+from app.repositories.recommendation_repository import RecommendationRepository
+
+
+def main():
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        products = RecommendationRepository(db).rebuild()
+    finally:
+        db.close()
+    print(f"Rebuilt recommendations for {products} products in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Backfill product_daily_sales from orders/order_items.
+
+Usage: python -m app.tasks.rebuild_sales_aggregates
+"""
+import time
+
+from app.database import SessionLocal
+from app.repositories.analytics_repository import AnalyticsRepository
+
+
+def main():
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        rows = AnalyticsRepository(db).rebuild()
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} product_daily_sales rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
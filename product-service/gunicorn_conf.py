@@ -0,0 +1,18 @@
+import multiprocessing
+import os
+import time
+
+# uvicorn[standard] kuruluysa UvicornWorker uvloop ve httptools'u kendisi seçer
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+# Uygulama master'da bir kez import edilir, worker'lar fork ile paylaşır
+preload_app = True
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+graceful_timeout = 30
+
+_started = time.perf_counter()
+
+
+def when_ready(server):
+    server.log.info("Master ready with %s workers in %.2fs", workers, time.perf_counter() - _started)
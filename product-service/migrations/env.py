@@ -0,0 +1,46 @@
+import importlib
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine, Base
+# Tüm modeller metadata'ya kayıtlı olsun
+for module in ("product", "cart", "order", "analytics", "recommendation"):
+    importlib.import_module(f"app.models.{module}")
+
+VERSION_TABLE = "alembic_version_product_service"
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=engine.url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        version_table=VERSION_TABLE,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            version_table=VERSION_TABLE,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
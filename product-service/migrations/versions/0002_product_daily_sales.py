@@ -0,0 +1,33 @@
+"""daily per-product sales aggregates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_daily_sales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "product_id"),
+    )
+    op.create_index("ix_product_daily_sales_product_id", "product_daily_sales", ["product_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("product_daily_sales")
@@ -0,0 +1,39 @@
+"""order co-occurrence counts and recommendations
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_cooccurrence",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("related_product_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("product_id", "related_product_id"),
+    )
+
+    op.create_table(
+        "product_recommendations",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("neighbours", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_recommendations")
+    op.drop_table("product_cooccurrence")
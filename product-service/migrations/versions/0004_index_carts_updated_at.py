@@ -0,0 +1,23 @@
+"""index carts.updated_at for the abandoned cart sweeper
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:03
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_carts_updated_at", "carts", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_carts_updated_at", table_name="carts")
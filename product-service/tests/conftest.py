@@ -0,0 +1,5 @@
+import importlib
+
+# İlişkiler sınıf adıyla tanımlı; mapper'lar kurulmadan önce tüm modeller yüklü olmalı
+for module in ("cart", "order", "product", "recommendation"):
+    importlib.import_module(f"app.models.{module}")
@@ -0,0 +1,51 @@
+import asyncio
+
+from ecommerce_common import ratelimit
+from ecommerce_common.ratelimit import InMemoryBucketStore, RateLimitMiddleware, Rule
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _status(middleware, forwarded_for: str) -> int:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/login",
+        "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+        "client": ("10.0.0.2", 40000),  # proxy
+    }
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    asyncio.run(middleware(scope, None, send))
+    return statuses[0]
+
+
+def test_spoofed_forwarded_for_does_not_get_a_new_bucket(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_TRUST_PROXY", True)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_PROXY_HOPS", 1)
+    store = InMemoryBucketStore()
+    middleware = RateLimitMiddleware(_ok, rules=[Rule("login", "POST", "/login", "10/minute", 2)], store=store)
+
+    # Proxy gerçek istemciyi (203.0.113.7) sona ekler; öndeki girdi her istekte değişir
+    statuses = [_status(middleware, f"198.51.100.{i}, 203.0.113.7") for i in range(4)]
+
+    assert statuses == [200, 200, 429, 429]
+    assert list(store._buckets) == ["login:ip:203.0.113.7"]
+
+
+def test_proxy_hops_counts_from_the_right(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_TRUST_PROXY", True)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_PROXY_HOPS", 2)
+    scope = {"headers": [(b"x-forwarded-for", b"1.1.1.1, 203.0.113.7, 10.0.0.9")], "client": ("10.0.0.2", 1)}
+    assert ratelimit._client_key(scope, "ip") == "ip:203.0.113.7"
+
+    # Beklenenden az girdi: proxy zinciri atlanmış, bağlantı adresi kullanılır
+    scope["headers"] = [(b"x-forwarded-for", b"203.0.113.7")]
+    assert ratelimit._client_key(scope, "ip") == "ip:10.0.0.2"
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.order import Order, OrderItem
+from app.models.recommendation import ProductCooccurrence, ProductRecommendation
+from app.repositories.recommendation_repository import RecommendationRepository
+
+K = 3
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _random_orders(count, seed=42):
+    rng = random.Random(seed)
+    # Tekrarlanan ürünler ve tek ürünlü siparişler de olsun
+    return [[rng.randint(1, 12) for _ in range(rng.randint(1, 5))] for _ in range(count)]
+
+
+def _state(db):
+    db.expire_all()
+    counts = {
+        (row.product_id, row.related_product_id): row.count
+        for row in db.query(ProductCooccurrence)
+    }
+    lists = {row.product_id: row.neighbours for row in db.query(ProductRecommendation)}
+    # Yalnızca tek ürünlü siparişlerde görülen ürünlerin listesi boş kalır; rebuild onları yazmaz
+    return counts, {product_id: top for product_id, top in lists.items() if top}
+
+
+def test_incremental_updates_match_a_full_rebuild(db):
+    repo = RecommendationRepository(db, k=K)
+    for product_ids in _random_orders(200):
+        order = Order(user_id=1, total_amount=0, status="completed")
+        order.items = [OrderItem(product_id=product_id, quantity=1, price=0) for product_id in product_ids]
+        db.add(order)
+        db.flush()
+        repo.record_order(product_ids)
+        db.commit()
+    incremental = _state(db)
+    assert incremental[0] and incremental[1]
+
+    repo.rebuild()
+    assert _state(db) == incremental
+
+
+def test_lists_are_capped_and_ordered(db):
+    repo = RecommendationRepository(db, k=K)
+    for product_ids in _random_orders(50, seed=7):
+        repo.record_order(product_ids)
+    db.commit()
+
+    for top in _state(db)[1].values():
+        assert len(top) <= K
+        assert top == sorted(top, key=lambda pair: (-pair[1], pair[0]))
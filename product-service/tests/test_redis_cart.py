@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.cache.fake_redis import FakeRedis
+from app.database import Base
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
+from app.repositories.redis_cart_repository import DIRTY_CARTS_KEY, RedisCartRepository, flush_dirty_carts
+from app.schemas.cart import CartItemCreate
+
+USER_ID = 7
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    # Postgres gibi yabancı anahtarları zorla
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add_all([
+        Product(id=1, name="kalem", price=10, stock=10, is_active=True),
+        Product(id=2, name="defter", price=20, stock=10, is_active=True),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+def _db_items(db, user_id):
+    db.expire_all()
+    cart = db.query(Cart).filter(Cart.user_id == user_id).one()
+    return {item.product_id: item.quantity for item in db.query(CartItem).filter(CartItem.cart_id == cart.id)}
+
+
+def test_add_merges_quantities_and_remove(db, redis):
+    repo = RedisCartRepository(db, redis)
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=2))
+    item = repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=3))
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=2, quantity=1))
+    assert item.quantity == 5
+
+    assert repo.remove_from_cart(USER_ID, 2)
+    assert not repo.remove_from_cart(USER_ID, 2)
+    cart = repo.get_cart(USER_ID)
+    assert [(i.product_id, i.quantity) for i in cart.items] == [(1, 5)]
+    # Yazmalar yalnızca Redis'e gider
+    assert db.query(Cart).count() == 0
+    assert redis.smembers(DIRTY_CARTS_KEY) == {str(USER_ID)}
+
+
+def test_flush_writes_dirty_carts(db, redis):
+    repo = RedisCartRepository(db, redis)
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=2))
+    repo.add_to_cart(USER_ID + 1, CartItemCreate(product_id=2, quantity=1))
+
+    assert flush_dirty_carts(db, redis) == 2
+    assert _db_items(db, USER_ID) == {1: 2}
+    assert _db_items(db, USER_ID + 1) == {2: 1}
+    assert redis.smembers(DIRTY_CARTS_KEY) == set()
+
+    # Sonraki flush mevcut sepeti günceller
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=1))
+    assert flush_dirty_carts(db, redis) == 1
+    assert _db_items(db, USER_ID) == {1: 3}
+    assert db.query(Cart).filter(Cart.user_id == USER_ID).count() == 1
+
+
+def test_flush_drops_deleted_products(db, redis):
+    repo = RedisCartRepository(db, redis)
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=1))
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=2, quantity=4))
+    db.query(Product).filter(Product.id == 2).delete()
+    db.commit()
+
+    flush_dirty_carts(db, redis)
+    assert _db_items(db, USER_ID) == {1: 1}
+    assert redis.hgetall(f"cart:{USER_ID}") == {"1": "1"}
+    assert redis.smembers(DIRTY_CARTS_KEY) == set()
+
+
+def test_persist_failure_leaves_cart_dirty(db, redis, monkeypatch):
+    repo = RedisCartRepository(db, redis)
+    repo.add_to_cart(USER_ID, CartItemCreate(product_id=1, quantity=1))
+
+    def broken(user_ids):
+        raise ConnectionError("redis went away")
+
+    monkeypatch.setattr(repo, "_write_to_db", broken)
+    repo.persist(USER_ID)  # checkout'u düşürmemeli
+    assert redis.smembers(DIRTY_CARTS_KEY) == {str(USER_ID)}
+
+    monkeypatch.undo()
+    flush_dirty_carts(db, redis)
+    assert _db_items(db, USER_ID) == {1: 1}
@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.clients.user_client import UserServiceClient
+
+
+def _user_service_stub(release: asyncio.Event, calls: list):
+    """In-process stand-in for user-service's POST /user/batch."""
+    app = FastAPI()
+
+    @app.post("/user/batch")
+    async def batch(request: dict):
+        calls.append(request["ids"])
+        await release.wait()
+        return [{"id": user_id, "username": f"user{user_id}"} for user_id in request["ids"]]
+
+    return app
+
+
+def test_waiters_survive_cancelled_owner():
+    async def scenario():
+        release, calls = asyncio.Event(), []
+        client = UserServiceClient(
+            base_url="http://user-service",
+            transport=httpx.ASGITransport(app=_user_service_stub(release, calls)),
+        )
+        owner = asyncio.create_task(client.get_users([1, 2]))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(client.get_users([1, 2]))
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1  # ikinci çağrı ilkine bağlandı
+
+        owner.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        users = await asyncio.wait_for(waiter, timeout=2)
+        await client.aclose()
+        return owner, users, calls
+
+    owner, users, calls = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert sorted(users) == [1, 2]
+    assert len(calls) == 2
@@ -0,0 +1,5 @@
+"""Code shared by user-service and product-service: metrics, profiling and rate limiting.
+
+Installed into both images (pip install ./shared); for local runs use
+`pip install -e ../shared` from a service directory.
+"""
@@ -0,0 +1,69 @@
+"""Minimal in-process metrics in Prometheus text format.
+
+Values are per worker process; scrape each worker (or run one worker) for
+exact totals.
+"""
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauge_functions: Dict[str, Callable[[], Optional[float]]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def gauge_function(self, name: str, function: Callable[[], Optional[float]]):
+        """Gauge computed at scrape time; a None result leaves the series out."""
+        with self._lock:
+            self._gauge_functions[name] = function
+
+    def get(self, name: str, **labels) -> float:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            return self._counters.get(name, self._gauges.get(name, {})).get(key, 0)
+
+    def render(self) -> str:
+        with self._lock:
+            functions = list(self._gauge_functions.items())
+        values = [(name, function()) for name, function in functions]
+        lines = []
+        with self._lock:
+            for name, value in values:
+                if value is None:
+                    self._gauges.pop(name, None)
+                else:
+                    self._gauges[name] = {(): value}
+            for kind, families in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(families.items()):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        labels = ",".join(f'{k}="{v}"' for k, v in key)
+                        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return metrics.render()
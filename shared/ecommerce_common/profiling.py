@@ -0,0 +1,298 @@
+"""Opt-in per-request profiling.
+
+Nothing is installed unless PROFILING_ENABLED=true. A request is then
+profiled when it carries a valid signed X-Profile-Token header, or is picked
+by PROFILE_SAMPLE_RATE. Of the sampled requests PROFILE_LATENCY_THRESHOLD_MS
+keeps only the slow ones; with no sample rate set only header requests are
+profiled. One request is profiled at a time per worker; requests picked
+while the slot is busy are counted in `profiles_skipped_total`.
+
+A profile holds collapsed stack samples plus the SQL statements run by the
+request and their timings. Stack samples are process-wide: every busy
+thread is sampled (so sync endpoints in the threadpool are covered), which
+means requests running concurrently show up too. Each stack is prefixed
+with its thread name, and `concurrent_requests` records how many other
+requests were in flight. Profiles are written to a bounded ring of JSON
+files in PROFILE_DIR.
+
+Sign a header token with: python -m ecommerce_common.profiling --ttl 300
+"""
+import argparse
+import contextvars
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ecommerce_common.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_LATENCY_THRESHOLD_MS = float(os.getenv("PROFILE_LATENCY_THRESHOLD_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+PROFILE_HEADER = "X-Profile-Token"
+MAX_SQL_STATEMENTS = 500
+MAX_STACK_DEPTH = 64
+PROFILE_NAME_RE = re.compile(r"^[0-9]+-[A-Za-z0-9_.-]+\.json$")
+# Bekleyen (boşta) thread'lerin yaprak çerçeveleri örneklenmez
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "socket.py")
+
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def sign_profile_token(ttl: int = 300, secret: str = PROFILE_SECRET) -> str:
+    expires = str(int(time.time()) + ttl)
+    signature = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(token: str, secret: str = PROFILE_SECRET) -> bool:
+    if not secret or "." not in token:
+        return False
+    expires, signature = token.split(".", 1)
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected) and expires.isdigit() and int(expires) > time.time()
+
+
+class StackSampler:
+    def __init__(self, interval: float, in_flight: Callable[[], int] = lambda: 1):
+        self.interval = interval
+        self.in_flight = in_flight
+        # Son örnekten sonra sampler thread'inde çağrılır
+        self.on_finish: Optional[Callable[[], None]] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.max_in_flight = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Ask the thread to stop without waiting for it; results are final in `on_finish`."""
+        self._stop.set()
+
+    def _run(self):
+        try:
+            self._sample_until_stopped()
+        finally:
+            if self.on_finish is not None:
+                self.on_finish()
+
+    def _sample_until_stopped(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight())
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class RequestProfile:
+    def __init__(self, trigger: str, in_flight: Callable[[], int] = lambda: 1):
+        self.trigger = trigger
+        self.sql: List[dict] = []
+        self.sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000, in_flight)
+
+    def record_sql(self, statement: str, duration_ms: float):
+        if len(self.sql) < MAX_SQL_STATEMENTS:
+            self.sql.append({"statement": statement[:2000], "duration_ms": round(duration_ms, 3)})
+
+
+class ProfileStore:
+    """Ring of at most `max_files` profile files; the oldest are deleted first."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, profile: dict) -> str:
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{profile['method']}{profile['path']}")[:80]
+        name = f"{int(time.time() * 1000)}-{slug}.json"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "w") as f:
+                json.dump(profile, f)
+            for old in self._names()[:-self.max_files]:
+                # Worker'lar aynı dizini paylaşır; dosyayı başka biri silmiş olabilir
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+        return name
+
+    def _names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(n for n in os.listdir(self.directory) if PROFILE_NAME_RE.match(n))
+
+    def list(self) -> List[dict]:
+        result = []
+        for name in reversed(self._names()):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            result.append({
+                "name": name,
+                "size": stat.st_size,
+                "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            })
+        return result
+
+    def path(self, name: str) -> Optional[str]:
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, store: ProfileStore = profile_store):
+        super().__init__(app)
+        self.store = store
+        # Aynı anda tek profil: ek yük sınırlı kalsın
+        self._slot = threading.Semaphore(1)
+        self._in_flight = 0
+
+    def _trigger(self, request) -> Optional[str]:
+        token = request.headers.get(PROFILE_HEADER)
+        if token and verify_profile_token(token):
+            return "header"
+        # Eşik yalnızca örneklenenler arasından seçer; aksi halde her istek aday olurdu
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def dispatch(self, request, call_next):
+        self._in_flight += 1
+        try:
+            return await self._dispatch(request, call_next)
+        finally:
+            self._in_flight -= 1
+
+    async def _dispatch(self, request, call_next):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return await call_next(request)
+        if not self._slot.acquire(blocking=False):
+            metrics.inc("profiles_skipped_total", trigger=trigger)
+            return await call_next(request)
+
+        profile = RequestProfile(trigger, lambda: self._in_flight)
+        token = _current_profile.set(profile)
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        profile.sampler.start()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            _current_profile.reset(token)
+            duration_ms = (time.perf_counter() - start) * 1000
+            keep = trigger == "header" or duration_ms >= PROFILE_LATENCY_THRESHOLD_MS
+            data = {
+                "method": request.method,
+                "path": request.url.path,
+                "status": status_code,
+                "trigger": trigger,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(duration_ms, 3),
+                "sql_total_ms": round(sum(s["duration_ms"] for s in profile.sql), 3),
+                "sql": profile.sql,
+                "sample_interval_ms": PROFILE_SAMPLE_INTERVAL_MS,
+            }
+            # Sampler'ı event loop'ta beklemeyiz; profil kendi thread'inde tamamlanıp yazılır
+            profile.sampler.on_finish = lambda: self._finish(profile, data, keep)
+            profile.sampler.stop()
+
+    def _finish(self, profile: RequestProfile, data: dict, keep: bool):
+        try:
+            if keep:
+                sampler = profile.sampler
+                self._save(profile, {
+                    **data,
+                    "samples": sampler.samples,
+                    "stack_scope": "process",
+                    "concurrent_requests": max(0, sampler.max_in_flight - 1),
+                    "stacks": dict(sampler.stacks.most_common()),
+                })
+        finally:
+            self._slot.release()
+
+    def _save(self, profile: RequestProfile, data: dict):
+        # Profil yazılamasa da (disk dolu vb.) yanıt etkilenmemeli
+        try:
+            self.store.save(data)
+        except OSError:
+            logger.exception("Could not save %s profile for %s", profile.trigger, data["path"])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None and conn.info.get("profile_query_start"):
+        started = conn.info["profile_query_start"].pop()
+        profile.record_sql(statement, (time.perf_counter() - started) * 1000)
+
+
+def install_profiling(app, engine):
+    """Add the middleware and SQL hooks; a no-op unless PROFILING_ENABLED is set."""
+    if not PROFILING_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(ProfilingMiddleware)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sign an X-Profile-Token header value")
+    parser.add_argument("--ttl", type=int, default=300, help="validity in seconds")
+    args = parser.parse_args()
+    if not PROFILE_SECRET:
+        parser.error("PROFILE_SECRET is not set")
+    print(sign_profile_token(args.ttl))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Token-bucket rate limiting applied before routing.
+
+Rules are keyed by (method, path) and limit per client IP or per user. The
+user is the `sub` of a bearer token whose signature verifies; requests
+without one are limited by IP, so made-up tokens cannot mint fresh buckets.
+Buckets live in process memory by default; set RATE_LIMIT_REDIS_URL to share
+them across workers through an atomic Lua script. Each service passes its
+default rules to `install_rate_limiting`; RATE_LIMIT_RULES overrides them
+with a JSON list such as
+[{"name": "checkout", "method": "POST", "path": "/api/orders/",
+  "rate": "10/minute", "burst": 5, "scope": "token"}].
+Tokens are verified with JWT_SECRET_KEY / JWT_ALGORITHM, the key user-service
+signs them with.
+"""
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+
+from ecommerce_common.metrics import metrics
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_RULES = os.getenv("RATE_LIMIT_RULES", "")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+RATE_LIMIT_PROXY_HOPS = max(1, int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1")))  # önümüzdeki güvenilir proxy sayısı
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-123")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class Rule:
+    __slots__ = ("name", "method", "path", "rate", "burst", "scope")
+
+    def __init__(self, name: str, method: str, path: str, rate: str, burst: int, scope: str = "ip"):
+        count, period = rate.split("/")
+        self.name = name
+        self.method = method.upper()
+        self.path = path
+        self.rate = float(count) / PERIODS[period]  # saniyede token
+        self.burst = int(burst)
+        self.scope = scope
+
+
+def load_rules(default_rules: List[dict], raw: str = RATE_LIMIT_RULES) -> List[Rule]:
+    return [Rule(**spec) for spec in (json.loads(raw) if raw else default_rules)]
+
+
+def take_token(tokens: float, updated_at: float, now: float, rate: float, burst: int) -> Tuple[bool, float, float]:
+    """Refill and try to take one token. Returns (allowed, tokens_left, retry_after)."""
+    tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class InMemoryBucketStore:
+    """Per-process buckets, LRU-bounded to `max_keys`. Also serves as the test fake."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            allowed, tokens, retry_after = take_token(tokens, updated_at, now, rate, burst)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by all workers; refill and take happen atomically in Redis.
+
+    Takes a redis.asyncio client so the event loop is not blocked.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[rate, burst])
+        return bool(int(allowed)), float(retry_after)
+
+
+def create_store():
+    if RATE_LIMIT_REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return RedisBucketStore(aioredis.Redis.from_url(RATE_LIMIT_REDIS_URL, decode_responses=True))
+    return InMemoryBucketStore()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware so rejected requests never reach routing, the DB or hashing."""
+
+    def __init__(self, app, rules: Optional[List[Rule]] = None, store=None, default_rules: List[dict] = ()):
+        self.app = app
+        self.rules: Dict[Tuple[str, str], List[Rule]] = {}
+        for rule in load_rules(default_rules) if rules is None else rules:
+            self.rules.setdefault((rule.method, rule.path), []).append(rule)
+        self.store = store or create_store()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        for rule in self.rules.get((scope["method"], scope["path"]), ()):
+            key = f"{rule.name}:{_client_key(scope, rule.scope)}"
+            result = self.store.take(key, rule.rate, rule.burst)
+            allowed, retry_after = await result if inspect.isawaitable(result) else result
+            if not allowed:
+                return await self._reject(rule, retry_after, scope, receive, send)
+        return await self.app(scope, receive, send)
+
+    async def _reject(self, rule: Rule, retry_after: float, scope, receive, send):
+        metrics.inc("rate_limit_rejected_total", rule=rule.name, scope=rule.scope)
+        response = JSONResponse(
+            {"detail": "Too many requests"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
+
+
+def _client_key(scope, kind: str) -> str:
+    headers = dict(scope.get("headers") or [])
+    if kind == "token":
+        subject = _token_subject(headers.get(b"authorization", b""))
+        if subject is not None:
+            return "user:" + subject
+    if RATE_LIMIT_TRUST_PROXY and b"x-forwarded-for" in headers:
+        # Soldaki girdileri istemci yazar; güvenilir proxy'nin eklediği sağdan sayılır
+        forwarded = headers[b"x-forwarded-for"].split(b",")
+        if len(forwarded) >= RATE_LIMIT_PROXY_HOPS:
+            return "ip:" + forwarded[-RATE_LIMIT_PROXY_HOPS].strip().decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def _token_subject(authorization: bytes) -> Optional[str]:
+    """`sub` of a validly signed, unexpired bearer token; None otherwise."""
+    if not authorization.lower().startswith(b"bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:].decode("latin-1"), JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+def install_rate_limiting(app, default_rules: List[dict]):
+    if RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, default_rules=default_rules)
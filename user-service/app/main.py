@@ -1,11 +1,24 @@
+import time
+_import_started = time.perf_counter()
+
+import logging
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, user, address, contact
-from app.config import get_db, engine
-from app.models.user import Base
+from app.routers import auth, user, address, contact, profiles
+from app.config import get_db, engine, PASSWORD_HASH_CALIBRATE
+from app.services.token_revocation import revocation_sync
+from app.services.password_hashing import calibrate_and_configure
+from ecommerce_common.profiling import install_profiling
+from ecommerce_common.metrics import metrics, router as metrics_router
+from app.ratelimit import install_rate_limiting
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="User Service API", version="1.0.0")
 
+# Rate limiting (CORS'un içinde kalsın ki 429 yanıtları da CORS başlıklarını alsın)
+install_rate_limiting(app)
+
 # CORS ayarları
 app.add_middleware(
     CORSMiddleware,
@@ -15,14 +28,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Veritabanı tablolarını oluştur
-Base.metadata.create_all(bind=engine)
+# İstek profilleme (PROFILING_ENABLED=true değilse hiçbir şey eklenmez)
+install_profiling(app, engine)
 
 # Router'ları ekle
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(address.router)
 app.include_router(contact.router)
+app.include_router(profiles.router)
+app.include_router(metrics_router)
+
+# Import sırasında: gunicorn preload_app ile master'da bir kez ölçülür, worker'lar fork ile devralır
+if PASSWORD_HASH_CALIBRATE:
+    calibrate_and_configure()
+
+metrics.set_gauge("app_import_seconds", time.perf_counter() - _import_started)
+
+@app.on_event("startup")
+def start_revocation_sync():
+    revocation_sync.start()
+
+@app.on_event("startup")
+def record_startup_time():
+    # Son startup handler'ı; worker istek kabul etmeye hazır
+    startup_seconds = time.perf_counter() - _import_started
+    metrics.set_gauge("app_startup_seconds", startup_seconds)
+    logger.info("User service started in %.2fs", startup_seconds)
+
+@app.on_event("shutdown")
+def stop_revocation_sync():
+    revocation_sync.stop()
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -0,0 +1,55 @@
+"""Bring the database schema to the latest Alembic revision.
+
+Databases created by the old import-time create_all() have the tables but no
+version row. Depending on the release that created them they may already hold
+tables of later revisions too, so they are stamped at the newest revision
+whose tables and indexes all exist, and upgraded from there.
+
+Usage: python -m app.migrate
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.config import engine
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VERSION_TABLE = "alembic_version_user_service"
+
+# create_all() ile kurulmuş veritabanlarında her revizyonun oluşturduğu nesneler
+STAMP_MARKERS = [
+    ("0001", {"users": [], "roles": [], "user_roles": [], "addresses": [], "contacts": []}),
+    ("0002", {"token_revocations": []}),
+]
+
+
+def existing_revision(inspector):
+    """Newest revision whose objects are all present, or None for an empty database."""
+    tables = set(inspector.get_table_names())
+    current = None
+    for revision, objects in STAMP_MARKERS:
+        for table, indexes in objects.items():
+            if table not in tables:
+                return current
+            if indexes and not set(indexes) <= {i["name"] for i in inspector.get_indexes(table)}:
+                return current
+        current = revision
+    return current
+
+
+def main():
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+
+    inspector = inspect(engine)
+    if VERSION_TABLE not in inspector.get_table_names():
+        revision = existing_revision(inspector)
+        if revision is not None:
+            command.stamp(config, revision)
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    main()
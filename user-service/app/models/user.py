@@ -1,4 +1,5 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.config import Base
 
@@ -55,4 +56,14 @@ class Contact(Base):
     phone_number = Column(String(20))
     mobile_number = Column(String(20), nullable=False)
 
-    user = relationship("User", back_populates="contacts")
\ No newline at end of file
+    user = relationship("User", back_populates="contacts")
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(36), unique=True, index=True)  # tek bir token
+    subject = Column(String(50), index=True)  # kullanıcının bu andan önceki tüm tokenları
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    reason = Column(String(16))  # "rotated": refresh rotasyonunda iptal edildi
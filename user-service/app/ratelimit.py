@@ -0,0 +1,13 @@
+"""user-service rate-limit rules; the limiter is ecommerce_common.ratelimit."""
+from ecommerce_common import ratelimit
+
+DEFAULT_RULES = [
+    {"name": "login", "method": "POST", "path": "/auth/token", "rate": "10/minute", "burst": 10, "scope": "ip"},
+    {"name": "refresh", "method": "POST", "path": "/auth/refresh", "rate": "30/minute", "burst": 10, "scope": "ip"},
+    {"name": "register", "method": "POST", "path": "/user/", "rate": "10/minute", "burst": 5, "scope": "ip"},
+    {"name": "list_users", "method": "GET", "path": "/user/", "rate": "60/minute", "burst": 20, "scope": "ip"},
+]
+
+
+def install_rate_limiting(app):
+    ratelimit.install_rate_limiting(app, DEFAULT_RULES)
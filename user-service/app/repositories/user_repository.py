@@ -1,9 +1,8 @@
+from typing import List
 from sqlalchemy.orm import Session
 from app.models.user import User, Role, Address, Contact
 from app.schemas.user import UserCreate, AddressBase, ContactBase
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.password_hashing import pwd_context
 
 class UserRepository:
     def __init__(self, db: Session):
@@ -18,6 +17,11 @@ class UserRepository:
     def get_users(self, skip: int = 0, limit: int = 100):
         return self.db.query(User).offset(skip).limit(limit).all()
 
+    def get_users_by_ids(self, user_ids: List[int]):
+        if not user_ids:
+            return []
+        return self.db.query(User).filter(User.id.in_(set(user_ids))).all()
+
     def create_user(self, user: UserCreate):
         hashed_password = pwd_context.hash(user.password)
         db_user = User(
@@ -34,8 +38,13 @@ class UserRepository:
         user = self.get_user_by_username(username)
         if not user:
             return False
-        if not pwd_context.verify(password, user.hashed_password):
+        valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+        if not valid:
             return False
+        if new_hash:
+            # Hash parametreleri değişmiş: kullanıcıyı yeni parametrelere taşı
+            user.hashed_password = new_hash
+            self.db.commit()
         return user
 
     def create_address(self, user_id: int, address: AddressBase):
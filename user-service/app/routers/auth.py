@@ -4,42 +4,73 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
+import time
+import uuid
 
-from app.schemas.user import Token, TokenData, UserCreate, UserInDB
+from app.schemas.user import Token, TokenData, UserCreate, UserInDB, RefreshRequest
 from app.services.user_service import UserService
+from app.services.token_revocation import (
+    ROTATED, revocation_list, revoke_token, revoke_subject, revoked_by_rotation
+)
 from app.repositories.user_repository import UserRepository
 from app.models.user import User
-from app.config import get_db, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import (
+    get_db, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, token_type: str = "access"):
     to_encode = data.copy()
+    # iat kesirli saniye: logout-all kesimi aynı saniyede verilen tokenları ayırt edebilsin
+    issued_at = time.time()
+    now = datetime.utcfromtimestamp(issued_at)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=15)
+    to_encode.update({"exp": expire, "iat": issued_at, "jti": str(uuid.uuid4()), "type": token_type})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+def create_refresh_token(data: dict):
+    return create_access_token(
+        data, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), token_type="refresh"
+    )
+
+def issue_tokens(username: str) -> dict:
+    access_token = create_access_token(
+        data={"sub": username}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
+    refresh_token = create_refresh_token(data={"sub": username})
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+def decode_token(token: str, token_type: str = "access") -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
+    if payload.get("sub") is None or payload.get("type", "access") != token_type:
+        raise credentials_exception
+    # Sadece bellekteki iptal listesine bakılır, veritabanına gidilmez
+    if revocation_list.is_revoked(payload.get("jti"), payload["sub"], payload.get("iat")):
+        raise credentials_exception
+    return payload
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    return decode_token(token)
+
+async def get_current_user(payload: dict = Depends(get_token_payload), db: Session = Depends(get_db)):
+    token_data = TokenData(username=payload["sub"])
+
     user_repo = UserRepository(db)
     user_service = UserService(user_repo)
     user = user_service.get_user_by_username(token_data.username)
@@ -61,11 +92,57 @@ async def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user.username)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    try:
+        payload = jwt.decode(request.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    username = payload.get("sub")
+    if username is None or payload.get("type") != "refresh" or payload.get("jti") is None:
+        raise credentials_exception
+    # logout-all
+    if revocation_list.is_revoked(None, username, payload.get("iat")):
+        raise credentials_exception
+
+    user_repo = UserRepository(db)
+    user_service = UserService(user_repo)
+    user = user_service.get_user_by_username(username)
+    if user is None or not user.is_active:
+        raise credentials_exception
+
+    # Eski token'ı atomik olarak iptal et; eşzamanlı iki refresh'ten yalnızca biri geçer
+    if not revoke_token(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]), reason=ROTATED):
+        if revoked_by_rotation(db, payload["jti"]):
+            # Döndürülmüş bir refresh token tekrar kullanıldı: token çalınmış olabilir,
+            # kullanıcının tüm tokenlarını iptal et
+            revoke_subject(db, username, datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+        raise credentials_exception
+    return issue_tokens(user.username)
+
+@router.post("/logout")
+async def logout(
+    request: Optional[RefreshRequest] = None,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+):
+    if payload.get("jti"):
+        revoke_token(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    if request is not None:
+        try:
+            refresh_payload = jwt.decode(request.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            refresh_payload = {}
+        if refresh_payload.get("sub") == payload["sub"] and refresh_payload.get("jti"):
+            revoke_token(db, refresh_payload["jti"], datetime.utcfromtimestamp(refresh_payload["exp"]))
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+async def logout_all(payload: dict = Depends(get_token_payload), db: Session = Depends(get_db)):
+    revoke_subject(db, payload["sub"], datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    return {"message": "All sessions revoked"}
 
 @router.get("/checkLogin")
 async def check_login(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.models.user import User
+from app.routers.auth import get_current_user
+from ecommerce_common.profiling import profile_store
+
+router = APIRouter(prefix="/admin/profiles", tags=["profiling"])
+
+def get_current_superuser(current_user: User = Depends(get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
+
+@router.get("/")
+def list_profiles(current_user: User = Depends(get_current_superuser)):
+    return profile_store.list()
+
+@router.get("/{name}")
+def download_profile(name: str, current_user: User = Depends(get_current_superuser)):
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
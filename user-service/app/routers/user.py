@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.schemas.user import UserInDB, UserCreate
+from app.schemas.user import UserInDB, UserCreate, UserSummary, UserBatchRequest
 from app.services.user_service import UserService
 from app.repositories.user_repository import UserRepository
 from app.models.user import User
@@ -29,6 +29,12 @@ def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     users = user_service.get_users(skip=skip, limit=limit)
     return users
 
+@router.post("/batch", response_model=List[UserSummary])
+def read_users_batch(request: UserBatchRequest, db: Session = Depends(get_db)):
+    user_repo = UserRepository(db)
+    user_service = UserService(user_repo)
+    return user_service.get_users_by_ids(request.ids)
+
 @router.get("/me", response_model=UserInDB)
 async def read_user_me(current_user: User = Depends(get_current_user)):
     return current_user
\ No newline at end of file
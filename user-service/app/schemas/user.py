@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 class UserBase(BaseModel):
@@ -16,9 +16,25 @@ class UserInDB(UserBase):
     class Config:
         orm_mode = True
 
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    is_active: bool
+
+    class Config:
+        orm_mode = True
+
+class UserBatchRequest(BaseModel):
+    ids: List[int] = Field(..., max_items=500)
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
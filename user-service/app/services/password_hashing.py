@@ -0,0 +1,121 @@
+import argparse
+import logging
+import math
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from app.config import (
+    PASSWORD_HASH_SCHEME,
+    BCRYPT_ROUNDS,
+    ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    PASSWORD_HASH_TARGET_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MAX_TIME_COST = 20
+CALIBRATION_TOLERANCE = 1
+
+
+def context_settings(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST,
+    argon2_parallelism: int = ARGON2_PARALLELISM,
+    tolerance: int = 0,
+) -> dict:
+    """`tolerance` widens the accepted cost band around the default; hashes
+    outside [default - tolerance, default + tolerance] are rehashed on login."""
+    # tolerance=0: needs_update farklı parametreli her hash'i yakalar
+    return dict(
+        schemes=["argon2", "bcrypt"],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds - tolerance,
+        bcrypt__max_rounds=bcrypt_rounds + tolerance,
+        argon2__default_rounds=argon2_time_cost,
+        argon2__min_rounds=max(1, argon2_time_cost - tolerance),
+        argon2__max_rounds=argon2_time_cost + tolerance,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = CryptContext(**context_settings())
+
+
+def configure(**params):
+    pwd_context.update(**context_settings(**params))
+
+
+def _verify_ms(context: CryptContext, samples: int = 3) -> float:
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float = PASSWORD_HASH_TARGET_MS, scheme: str = PASSWORD_HASH_SCHEME) -> dict:
+    """Return the hash parameters whose verify time is closest to `target_ms` on this machine."""
+    if scheme == "bcrypt":
+        # bcrypt maliyeti her round'da ikiye katlanır: bir ölçüm yeterli
+        base_ms = _verify_ms(CryptContext(**context_settings("bcrypt", bcrypt_rounds=BCRYPT_MIN_ROUNDS)))
+        rounds = BCRYPT_MIN_ROUNDS + round(math.log2(max(target_ms / base_ms, 1)))
+        return {"scheme": "bcrypt", "bcrypt_rounds": min(rounds, BCRYPT_MAX_ROUNDS)}
+
+    # argon2: bellek ve paralellik sabit, süre time_cost ile doğrusal artar
+    base_ms = _verify_ms(CryptContext(**context_settings(
+        "argon2",
+        argon2_time_cost=1,
+        argon2_memory_cost=ARGON2_MEMORY_COST,
+        argon2_parallelism=ARGON2_PARALLELISM,
+    )))
+    time_cost = max(1, min(round(target_ms / base_ms), ARGON2_MAX_TIME_COST))
+    return {
+        "scheme": "argon2",
+        "argon2_time_cost": time_cost,
+        "argon2_memory_cost": ARGON2_MEMORY_COST,
+        "argon2_parallelism": ARGON2_PARALLELISM,
+    }
+
+
+def calibrate_and_configure(target_ms: float = PASSWORD_HASH_TARGET_MS, scheme: str = PASSWORD_HASH_SCHEME) -> dict:
+    """Calibrate and apply, accepting hashes one cost step either side.
+
+    Run once per process tree (before workers fork): separate measurements
+    can differ by a step, and with a pinned band workers (or replicas) would
+    keep rehashing each other's hashes.
+    """
+    params = calibrate(target_ms, scheme)
+    configure(tolerance=CALIBRATION_TOLERANCE, **params)
+    logger.info("Password hashing calibrated for %.0f ms: %s", target_ms, params)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate password hash cost for this machine")
+    parser.add_argument("--target-ms", type=float, default=PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default=PASSWORD_HASH_SCHEME)
+    args = parser.parse_args()
+
+    params = calibrate(args.target_ms, args.scheme)
+    configure(**params)
+    print(f"# measured verify time: {_verify_ms(pwd_context):.0f} ms (target {args.target_ms:.0f} ms)")
+    print(f"PASSWORD_HASH_SCHEME={params.pop('scheme')}")
+    for key, value in params.items():
+        print(f"{key.upper()}={value}")
+
+
+if __name__ == "__main__":
+    main()
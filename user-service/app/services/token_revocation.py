@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import math
+import select
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.config import (
+    DATABASE_URL,
+    SessionLocal,
+    TOKEN_REVOCATION_CAPACITY,
+    TOKEN_REVOCATION_SYNC_SECONDS,
+)
+from app.models.user import TokenRevocation
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "token_revocations"
+ROTATED = "rotated"  # refresh rotasyonunda iptal; yeniden kullanımı hırsızlık sayılır
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """In-memory view of `token_revocations`.
+
+    The Bloom filter answers the common "not revoked" case without touching
+    the exact set; a hit is confirmed against the exact jti map. Subject
+    revocations invalidate every token of a user issued before that moment.
+    """
+
+    def __init__(self, capacity: int = TOKEN_REVOCATION_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._jtis: Dict[str, float] = {}
+        self._subjects: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity)
+
+    def add_jti(self, jti: str, expires_at: float):
+        with self._lock:
+            self._jtis[jti] = expires_at
+            if len(self._jtis) > self._bloom.capacity:
+                self._rebuild(time.time())
+            else:
+                self._bloom.add(jti)
+
+    def add_subject(self, subject: str, revoked_at: float):
+        # Token'ların iat değeri mikro saniye hassasiyetinde; kesim de öyle karşılaştırılır
+        with self._lock:
+            if revoked_at > self._subjects.get(subject, 0):
+                self._subjects[subject] = revoked_at
+
+    def is_revoked(self, jti: Optional[str], subject: Optional[str], issued_at: Optional[float]) -> bool:
+        if subject is not None and subject in self._subjects:
+            if issued_at is None or issued_at < self._subjects[subject]:
+                return True
+        if jti is None:
+            return False
+        return jti in self._bloom and jti in self._jtis
+
+    def prune(self):
+        """Drop expired entries; their tokens would fail the `exp` check anyway."""
+        with self._lock:
+            self._rebuild(time.time())
+
+    def _rebuild(self, now: float):
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        bloom = BloomFilter(max(self.capacity, len(self._jtis) * 2))
+        for jti in self._jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def apply(self, row: TokenRevocation):
+        if row.jti:
+            self.add_jti(row.jti, _timestamp(row.expires_at))
+        if row.subject:
+            self.add_subject(row.subject, _timestamp(row.created_at))
+
+
+def _timestamp(value: datetime) -> float:
+    # Modeller naive UTC datetime kullanıyor
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+class RevocationSync:
+    """Keeps a worker's RevocationList in step with the `token_revocations` table.
+
+    A background thread LISTENs on a Postgres channel and pulls rows past its
+    watermark whenever another worker revokes a token, falling back to polling
+    every `interval` seconds. Request handling never queries the table.
+    """
+
+    def __init__(self, revocations: RevocationList, interval: float = TOKEN_REVOCATION_SYNC_SECONDS):
+        self.revocations = revocations
+        self.interval = interval
+        self.watermark = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = time.monotonic()
+
+    def start(self):
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="token-revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def refresh(self):
+        db = SessionLocal()
+        try:
+            query = db.query(TokenRevocation).filter(TokenRevocation.id > self.watermark)
+            if self.watermark == 0:
+                query = query.filter(TokenRevocation.expires_at > datetime.utcnow())
+            for row in query.order_by(TokenRevocation.id).all():
+                self.revocations.apply(row)
+                self.watermark = max(self.watermark, row.id)
+        finally:
+            db.close()
+
+    def _run(self):
+        conn = self._listen()
+        while not self._stop.is_set():
+            try:
+                if conn is not None:
+                    if select.select([conn], [], [], self.interval) != ([], [], []):
+                        conn.poll()
+                        conn.notifies.clear()
+                else:
+                    self._stop.wait(self.interval)
+                self.refresh()
+                if time.monotonic() - self._last_prune > 3600:
+                    self.revocations.prune()
+                    self._last_prune = time.monotonic()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+                if conn is not None:
+                    conn.close()
+                self._stop.wait(self.interval)
+                conn = self._listen()
+        if conn is not None:
+            conn.close()
+
+    def _listen(self):
+        if not DATABASE_URL.startswith("postgresql"):
+            return None
+        try:
+            import psycopg2
+
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+            return conn
+        except Exception:
+            logger.warning("LISTEN %s unavailable, polling every %ss", NOTIFY_CHANNEL, self.interval)
+            return None
+
+
+revocation_list = RevocationList()
+revocation_sync = RevocationSync(revocation_list)
+
+
+def _record(db, revocation: TokenRevocation):
+    db.add(revocation)
+    db.flush()
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                   {"channel": NOTIFY_CHANNEL, "payload": str(revocation.id)})
+    # Bu worker NOTIFY'ı beklemeden hemen uygular
+    if revocation.jti:
+        jti, expires_at = revocation.jti, _timestamp(revocation.expires_at)
+        db.commit()
+        revocation_list.add_jti(jti, expires_at)
+    else:
+        subject, revoked_at = revocation.subject, _timestamp(revocation.created_at)
+        db.commit()
+        revocation_list.add_subject(subject, revoked_at)
+
+
+def revoke_token(db, jti: str, expires_at: datetime, reason: Optional[str] = None) -> bool:
+    """Revoke one token; False if it was already revoked.
+
+    The unique jti makes this an atomic check-and-revoke: of two concurrent
+    calls for the same token exactly one returns True.
+    """
+    try:
+        _record(db, TokenRevocation(jti=jti, expires_at=expires_at, reason=reason))
+    except IntegrityError:
+        db.rollback()
+        revocation_list.add_jti(jti, _timestamp(expires_at))
+        return False
+    return True
+
+
+def revoked_by_rotation(db, jti: str) -> bool:
+    return db.query(TokenRevocation.id).filter(
+        TokenRevocation.jti == jti, TokenRevocation.reason == ROTATED
+    ).first() is not None
+
+
+def revoke_subject(db, subject: str, expires_at: datetime):
+    _record(db, TokenRevocation(subject=subject, expires_at=expires_at, created_at=datetime.utcnow()))
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from app.repositories.user_repository import UserRepository
 from app.models.user import User
 from app.schemas.user import UserCreate, UserInDB
@@ -16,6 +16,9 @@ class UserService:
     def get_users(self, skip: int = 0, limit: int = 100):
         return self.user_repository.get_users(skip, limit)
 
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        return self.user_repository.get_users_by_ids(user_ids)
+
     def create_user(self, user: UserCreate) -> User:
         return self.user_repository.create_user(user)
 
@@ -0,0 +1,36 @@
+"""token revocations
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "token_revocations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("jti", sa.String(length=36), nullable=True),
+        sa.Column("subject", sa.String(length=50), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_token_revocations_id", "token_revocations", ["id"])
+    op.create_index("ix_token_revocations_jti", "token_revocations", ["jti"])
+    op.create_index("ix_token_revocations_subject", "token_revocations", ["subject"])
+    op.create_index("ix_token_revocations_expires_at", "token_revocations", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("token_revocations")
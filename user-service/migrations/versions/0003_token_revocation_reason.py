@@ -0,0 +1,33 @@
+"""unique revoked jti and revocation reason
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:02
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Aynı jti birden fazla kez iptal edilmiş olabilir; en eskisi kalır
+    op.execute(
+        "DELETE FROM token_revocations WHERE jti IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM token_revocations WHERE jti IS NOT NULL GROUP BY jti)"
+    )
+    op.drop_index("ix_token_revocations_jti", table_name="token_revocations")
+    op.create_index("ix_token_revocations_jti", "token_revocations", ["jti"], unique=True)
+    op.add_column("token_revocations", sa.Column("reason", sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("token_revocations", "reason")
+    op.drop_index("ix_token_revocations_jti", table_name="token_revocations")
+    op.create_index("ix_token_revocations_jti", "token_revocations", ["jti"])
@@ -0,0 +1,5 @@
+#!/bin/sh
+# Önce migration, sonra servis
+set -e
+python -m app.migrate
+exec gunicorn -c gunicorn_conf.py app.main:app
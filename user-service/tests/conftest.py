@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# app.config motoru import sırasında kurar; ayarlar uygulamadan önce verilmeli
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "user-service-test.db"))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.config import Base, SessionLocal, engine
+from app.main import app
+from app.routers.auth import refresh_access_token
+from app.schemas.user import RefreshRequest
+
+PASSWORD = "correct-horse"
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(engine)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def username(client):
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    assert client.post("/user/", json={"username": name, "password": PASSWORD}).status_code == 200
+    return name
+
+
+def _login(client, username):
+    response = client.post("/auth/token", data={"username": username, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _refresh(client, refresh_token):
+    return client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def _check(client, tokens):
+    return client.get("/auth/checkLogin", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code
+
+
+def test_refresh_rotates_the_token(client, username):
+    tokens = _login(client, username)
+    rotated = _refresh(client, tokens["refresh_token"])
+    assert rotated.status_code == 200
+    assert _refresh(client, rotated.json()["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_refresh_token_revokes_every_session(client, username):
+    first, other = _login(client, username), _login(client, username)
+    rotated = _refresh(client, first["refresh_token"]).json()
+
+    assert _refresh(client, first["refresh_token"]).status_code == 401
+    assert _check(client, rotated) == 401
+    assert _check(client, other) == 401
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+    # Yeniden giriş çalışır
+    assert _check(client, _login(client, username)) == 200
+
+
+def test_refresh_token_revoked_by_logout_is_not_treated_as_theft(client, username):
+    tokens, other = _login(client, username), _login(client, username)
+    response = client.post(
+        "/auth/logout",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 200
+
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    assert _check(client, other) == 200
+
+
+def test_concurrent_refreshes_with_one_token_succeed_once(client, username):
+    tokens = _login(client, username)
+    results, barrier = [], threading.Barrier(4)
+
+    def refresh():
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            request = RefreshRequest(refresh_token=tokens["refresh_token"])
+            results.append(asyncio.run(refresh_access_token(request, db)))
+        except HTTPException as exc:
+            results.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=refresh) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4
+    assert sum(isinstance(result, dict) for result in results) == 1
+
+
+def test_logout_all_revokes_tokens_issued_before_it_only(client, username):
+    caller, other = _login(client, username), _login(client, username)
+    response = client.post("/auth/logout-all", headers={"Authorization": f"Bearer {caller['access_token']}"})
+    assert response.status_code == 200
+
+    assert _check(client, caller) == 401
+    assert _check(client, other) == 401
+    assert _refresh(client, other["refresh_token"]).status_code == 401
+    # Aynı saniye içinde alınan yeni oturum geçerli
+    fresh = _login(client, username)
+    assert _check(client, fresh) == 200
+    assert _refresh(client, fresh["refresh_token"]).status_code == 200